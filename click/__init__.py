@@ -14,37 +14,88 @@
     :license: BSD, see LICENSE for more details.
 """
 
-# Core classes
-from .core import Context, BaseCommand, Command, MultiCommand, Group, \
-     CommandCollection, Parameter, Option, Argument
+import sys
 
-# Decorators
-from .decorators import pass_context, pass_obj, make_pass_decorator, \
-     command, group, argument, option, confirmation_option, \
-     password_option, version_option, help_option
 
-# Types
-from .types import ParamType, File, Path, Choice, IntRange, STRING, INT, \
-     FLOAT, BOOL, UUID, UNPROCESSED
+# The public API is loaded lazily.  Importing the package only sets up
+# the namespace, the modules that implement an attribute are imported the
+# first time the attribute is accessed.  This keeps ``import click`` fast
+# for short lived scripts that only need a fraction of the functionality.
+all_by_module = {
+    # Core classes
+    'click.core': ['Context', 'BaseCommand', 'Command', 'MultiCommand',
+                   'Group', 'CommandCollection', 'Parameter', 'Option',
+                   'Argument'],
+
+    # Decorators
+    'click.decorators': ['pass_context', 'pass_obj', 'make_pass_decorator',
+                         'command', 'group', 'argument', 'option',
+                         'confirmation_option', 'password_option',
+                         'version_option', 'help_option'],
 
-# Utilities
-from .utils import echo, get_binary_stream, get_text_stream, open_file, \
-     format_filename, get_app_dir
+    # Types
+    'click.types': ['ParamType', 'File', 'Path', 'Choice', 'IntRange',
+                    'STRING', 'INT', 'FLOAT', 'BOOL', 'UUID',
+                    'UNPROCESSED'],
+
+    # Utilities
+    'click.utils': ['echo', 'get_binary_stream', 'get_text_stream',
+                    'open_file', 'format_filename', 'get_app_dir',
+                    'iter_chunks', 'copy_stream', 'buffered_echo'],
 
-# Terminal functions
-from .termui import prompt, confirm, get_terminal_size, echo_via_pager, \
-     progressbar, clear, style, unstyle, secho, edit, launch, getchar, \
-     pause
+    # Terminal functions
+    'click.termui': ['prompt', 'confirm', 'get_terminal_size',
+                     'echo_via_pager', 'progressbar', 'clear', 'style',
+                     'unstyle', 'secho', 'edit', 'launch', 'getchar',
+                     'pause'],
 
-# Exceptions
-from .exceptions import ClickException, UsageError, BadParameter, \
-     FileError, Abort, NoSuchOption, BadOptionUsage
+    # Exceptions
+    'click.exceptions': ['ClickException', 'UsageError', 'BadParameter',
+                         'FileError', 'Abort', 'NoSuchOption',
+                         'NoSuchCommand', 'BadOptionUsage'],
 
-# Formatting
-from .formatting import HelpFormatter, wrap_text
+    # Formatting
+    'click.formatting': ['HelpFormatter', 'wrap_text'],
 
-# Parsing
-from .parser import OptionParser
+    # Parsing
+    'click.parser': ['OptionParser'],
+}
+
+object_origins = {}
+for _module, _items in all_by_module.items():
+    for _item in _items:
+        object_origins[_item] = _module
+del _module, _items, _item
+
+# Submodules that used to be available as attributes because the package
+# imported them eagerly.
+lazy_submodules = set(x.split('.', 1)[1] for x in all_by_module)
+lazy_submodules.add('_compat')
+
+
+class _LazyModule(type(sys)):
+    """Automatically imports the modules of the public API on first
+    attribute access.
+    """
+
+    def __getattr__(self, name):
+        if name in object_origins:
+            module = __import__(object_origins[name], None, None, [name])
+            for extra_name in all_by_module[module.__name__]:
+                setattr(self, extra_name, getattr(module, extra_name))
+            return getattr(module, name)
+        elif name in lazy_submodules:
+            __import__('click.' + name)
+            return sys.modules['click.' + name]
+        raise AttributeError('module %r has no attribute %r'
+                             % (self.__name__, name))
+
+    def __dir__(self):
+        """Just show what we want to show."""
+        rv = list(self.__all__)
+        rv.extend(('__file__', '__doc__', '__all__', '__docformat__',
+                   '__name__', '__path__', '__package__', '__version__'))
+        return rv
 
 
 __all__ = [
@@ -63,7 +114,8 @@ __all__ = [
 
     # Utilities
     'echo', 'get_binary_stream', 'get_text_stream', 'open_file',
-    'format_filename', 'get_app_dir',
+    'format_filename', 'get_app_dir', 'iter_chunks', 'copy_stream',
+    'buffered_echo',
 
     # Terminal functions
     'prompt', 'confirm', 'get_terminal_size', 'echo_via_pager',
@@ -72,7 +124,7 @@ __all__ = [
 
     # Exceptions
     'ClickException', 'UsageError', 'BadParameter', 'FileError',
-    'Abort', 'NoSuchOption', 'BadOptionUsage',
+    'Abort', 'NoSuchOption', 'NoSuchCommand', 'BadOptionUsage',
 
     # Formatting
     'HelpFormatter', 'wrap_text',
@@ -83,3 +135,21 @@ __all__ = [
 
 
 __version__ = '4.0-dev'
+
+
+# Keep a reference to the original module so that its globals (which the
+# lazy module above refers to) stay alive and replace it with the lazy one.
+old_module = sys.modules['click']
+new_module = sys.modules['click'] = _LazyModule('click')
+new_module.__dict__.update({
+    '__file__':         __file__,
+    '__package__':      'click',
+    '__path__':         __path__,
+    '__doc__':          __doc__,
+    '__all__':          __all__,
+    '__version__':      __version__,
+    '__docformat__':    'restructuredtext en',
+    '__loader__':       globals().get('__loader__'),
+    '__spec__':         globals().get('__spec__'),
+    '_old_module':      old_module,
+})
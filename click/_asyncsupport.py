@@ -0,0 +1,150 @@
+"""
+    click._asyncsupport
+    ~~~~~~~~~~~~~~~~~~~
+
+    Support for coroutine callbacks.  This module uses syntax that is only
+    available on Python 3.5 and later and is only imported once a callback
+    actually returned an awaitable.
+"""
+import asyncio
+import functools
+import threading
+import weakref
+
+from .core import augment_usage_errors
+
+
+def _get_running_loop():
+    func = getattr(asyncio, 'get_running_loop', None)
+    if func is None:
+        return asyncio._get_running_loop()
+    try:
+        return func()
+    except RuntimeError:
+        return None
+
+
+async def _await(awaitable):
+    return await awaitable
+
+
+# Every loop has a lock that a thread holds while it runs the loop with
+# run_until_complete.  Threads that need the loop at the same time wait for
+# it instead of handing their coroutine to a loop that might stop before
+# getting to it.
+_loop_locks = weakref.WeakKeyDictionary()
+_loop_locks_lock = threading.Lock()
+
+
+def _get_loop_lock(loop):
+    with _loop_locks_lock:
+        lock = _loop_locks.get(loop)
+        if lock is None:
+            lock = _loop_locks[loop] = threading.Lock()
+        return lock
+
+
+def get_event_loop(ctx):
+    """Returns the event loop that coroutines of this invocation run on.
+    This is the loop of the closest context that has one.  If there is
+    none, a new loop is created for the root context and closed together
+    with it.
+    """
+    node = ctx
+    while node is not None:
+        if node.event_loop is not None:
+            return node.event_loop
+        root = node
+        node = node.parent
+    root.event_loop = loop = asyncio.new_event_loop()
+    root.call_on_close(loop.close)
+    return loop
+
+
+def run_awaitable(ctx, awaitable):
+    """Runs an awaitable to completion on the event loop of the context
+    and returns its result.  If the loop is already running in this thread
+    (the caller is a coroutine itself) the awaitable is returned unchanged
+    so that the caller can await it.
+    """
+    loop = get_event_loop(ctx)
+    if _get_running_loop() is loop:
+        return awaitable
+    with _get_loop_lock(loop):
+        # While the lock is held the loop can only be running if it was
+        # started for good by someone else, for instance by main_async or
+        # run_loop_in_thread.
+        if not loop.is_running():
+            return loop.run_until_complete(awaitable)
+        future = asyncio.run_coroutine_threadsafe(_await(awaitable), loop)
+    return future.result()
+
+
+def run_loop_in_thread(ctx):
+    """Keeps the event loop of the context running on a separate thread so
+    that coroutines from several threads run on it concurrently.  Returns
+    a function that stops the loop again.  If the loop is already running
+    this does nothing.
+    """
+    loop = get_event_loop(ctx)
+    with _get_loop_lock(loop):
+        if loop.is_running():
+            return lambda: None
+        started = threading.Event()
+        loop.call_soon(started.set)
+        thread = threading.Thread(target=loop.run_forever)
+        thread.daemon = True
+        thread.start()
+        started.wait()
+
+    def stop():
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+    return stop
+
+
+async def _invoke_chain_step(sub_ctx, semaphore):
+    async with semaphore:
+        with sub_ctx:
+            with augment_usage_errors(sub_ctx):
+                rv = sub_ctx.command.invoke(sub_ctx)
+                if hasattr(type(rv), '__await__'):
+                    rv = await rv
+                return rv
+
+
+async def _gather_chain(contexts, limit):
+    semaphore = asyncio.Semaphore(limit)
+    tasks = [asyncio.ensure_future(_invoke_chain_step(x, semaphore))
+             for x in contexts]
+    try:
+        return await asyncio.gather(*tasks)
+    finally:
+        # If one step failed, the steps that did not get to run yet are
+        # cancelled and their contexts closed.
+        for sub_ctx, task in zip(contexts, tasks):
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for sub_ctx, task in zip(contexts, tasks):
+            if task.cancelled():
+                sub_ctx.close()
+
+
+def gather_chain(ctx, contexts, limit):
+    """Invokes the subcommands of a chain with coroutine callbacks
+    concurrently on the event loop of the context and returns the list
+    of results.
+    """
+    loop = get_event_loop(ctx)
+    if loop.is_running() and _get_running_loop() is loop:
+        raise RuntimeError('Parallel chains cannot be invoked from a '
+                           'coroutine running on the same event loop.')
+    return run_awaitable(ctx, _gather_chain(contexts, limit))
+
+
+async def main_async(cmd, args, extra):
+    loop = _get_running_loop()
+    extra.setdefault('event_loop', loop)
+    return await loop.run_in_executor(None, functools.partial(
+        cmd.main, *args, **extra))
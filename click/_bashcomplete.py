@@ -2,6 +2,7 @@ import os
 from .utils import echo
 from .parser import split_arg_string
 from .core import MultiCommand, Option
+from .types import Choice
 
 
 COMPLETION_SCRIPT = '''
@@ -35,7 +36,7 @@ def resolve_ctx(cli, prog_name, args):
     return ctx
 
 
-def do_complete(cli, prog_name):
+def do_complete(cli, prog_name, manifest=None):
     cwords = split_arg_string(os.environ['COMP_WORDS'])
     cword = int(os.environ['COMP_CWORD'])
     args = cwords[1:cword]
@@ -44,10 +45,32 @@ def do_complete(cli, prog_name):
     except IndexError:
         incomplete = ''
 
+    # If a manifest is available the completion is answered from it so
+    # that no commands need to be loaded.  Commands the manifest does not
+    # know about (for instance ones registered at runtime) are completed
+    # by loading them as usual.
+    if manifest is not None:
+        items = manifest.complete(args, incomplete)
+        if items is not None:
+            for item in items:
+                echo(item)
+            return True
+
     ctx = resolve_ctx(cli, prog_name, args)
     if ctx is None:
         return True
 
+    # If the previous word is an option that expects one of a number of
+    # choices, the choices are completed.
+    if args:
+        for param in ctx.command.params:
+            if isinstance(param, Option) and args[-1] in param.opts and \
+               not param.is_flag and not param.count and \
+               isinstance(param.type, Choice):
+                for item in param.type.complete(incomplete):
+                    echo(item)
+                return True
+
     choices = []
     if incomplete and not incomplete[:1].isalnum():
         for param in ctx.command.params:
@@ -65,10 +88,11 @@ def do_complete(cli, prog_name):
     return True
 
 
-def bashcomplete(cli, prog_name, complete_var, complete_instr):
+def bashcomplete(cli, prog_name, complete_var, complete_instr,
+                 manifest=None):
     if complete_instr == 'source':
         echo(get_completion_script(prog_name, complete_var))
         return True
     elif complete_instr == 'complete':
-        return do_complete(cli, prog_name)
+        return do_complete(cli, prog_name, manifest)
     return False
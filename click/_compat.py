@@ -14,13 +14,13 @@ DEFAULT_COLUMNS = 80
 _ansi_re = re.compile('\033\[((?:\d|;)*)([a-zA-Z])')
 
 
-def _make_text_stream(stream, encoding, errors):
+def _make_text_stream(stream, encoding, errors, line_buffering=True):
     if encoding is None:
         encoding = get_best_encoding(stream)
     if errors is None:
         errors = 'replace'
     return _NonClosingTextIOWrapper(stream, encoding, errors,
-                                    line_buffering=True)
+                                    line_buffering=line_buffering)
 
 
 def is_ascii_encoding(encoding):
@@ -368,7 +368,7 @@ else:
 
 
 def get_streerror(e, default=None):
-    if hasattr(e, 'strerror'):
+    if getattr(e, 'strerror', None) is not None:
         msg = e.strerror
     else:
         if default is not None:
@@ -380,24 +380,87 @@ def get_streerror(e, default=None):
     return msg
 
 
+class _ReadThroughRaw(io.RawIOBase):
+    """Raw stream that reads through a buffered stream.  Each read is at
+    most one read on the underlying file so this does not block longer
+    than reading from the file itself would.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        data = self._stream.read1(len(b))
+        n = len(data)
+        b[:n] = data
+        return n
+
+
+def _rebuffer_stream(stream, mode, buffering):
+    # The standard streams come with fixed buffers.  To change the buffer
+    # size their file descriptor is opened again.  The new stream does not
+    # close the descriptor.  Streams without a descriptor (for instance in
+    # tests) are used as they are.
+    try:
+        fileno = stream.fileno()
+    except Exception:
+        return stream
+    if 'r' in mode:
+        # The buffer of stdin might already hold data (for instance after
+        # the compression was detected) which would be lost by reading
+        # from the descriptor.  Without a way to check for that without
+        # blocking, the new buffer reads through the old one instead.
+        if buffering <= 1 or not hasattr(stream, 'read1'):
+            return stream
+        return io.BufferedReader(_ReadThroughRaw(stream), buffering)
+    stream.flush()
+    return io.open(fileno, mode, buffering=buffering, closefd=False)
+
+
+def open_standard_stream(name, text=False, encoding=None, errors=None,
+                         buffering=-1):
+    """Returns the standard stream with the given name.  If `buffering`
+    is given, the stream is opened again with that buffer size and text
+    streams are not line buffered.
+    """
+    if buffering == -1:
+        if text:
+            return text_streams[name](encoding, errors)
+        return binary_streams[name]()
+    stream = _rebuffer_stream(binary_streams[name](),
+                              name == 'stdin' and 'rb' or 'wb', buffering)
+    if text:
+        return _make_text_stream(stream, encoding, errors,
+                                 line_buffering=False)
+    return stream
+
+
 def open_stream(filename, mode='r', encoding=None, errors='strict',
-                atomic=False):
+                atomic=False, compression=None, buffering=-1):
+    # Compressed files are opened through the codec of the compression
+    # if one was requested or detected.
+    if compression is not None:
+        rv = _open_compressed_stream(filename, mode, encoding, errors,
+                                     atomic, compression, buffering)
+        if rv is not None:
+            return rv
+
     # Standard streams first.  These are simple because they don't need
     # special handling for the atomic flag.  It's entirely ignored.
     if filename == '-':
-        if 'w' in mode:
-            if 'b' in mode:
-                return get_binary_stdout(), False
-            return get_text_stdout(encoding=encoding, errors=errors), False
-        if 'b' in mode:
-            return get_binary_stdin(), False
-        return get_text_stdin(encoding=encoding, errors=errors), False
+        return open_standard_stream('w' in mode and 'stdout' or 'stdin',
+                                    'b' not in mode, encoding, errors,
+                                    buffering), False
 
     # Non-atomic writes directly go out through the regular open functions.
     if not atomic:
         if encoding is None:
-            return open(filename, mode), True
-        return io.open(filename, mode, encoding=encoding, errors=errors), True
+            return open(filename, mode, buffering), True
+        return io.open(filename, mode, buffering=buffering,
+                       encoding=encoding, errors=errors), True
 
     # Atomic writes are more complicated.  They work by opening a file
     # as a proxy in the same folder and then using the fdopen
@@ -408,13 +471,170 @@ def open_stream(filename, mode='r', encoding=None, errors='strict',
                                         prefix='.__atomic-write')
 
     if encoding is not None:
-        f = io.open(fd, mode, encoding=encoding, errors=errors)
+        f = io.open(fd, mode, buffering=buffering, encoding=encoding,
+                    errors=errors)
     else:
-        f = os.fdopen(fd, mode)
+        f = os.fdopen(fd, mode, buffering)
 
     return _AtomicFile(f, tmp_filename, filename), True
 
 
+# The supported compressions with the file extension that selects them
+# and the magic bytes their streams start with.
+_compression_extensions = {
+    '.gz': 'gzip',
+    '.bz2': 'bz2',
+    '.xz': 'xz',
+}
+_compression_magic = [
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bz2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+]
+
+
+def _sniff_compression(stream):
+    head = _peek_stream(stream, 6)
+    for magic, codec in _compression_magic:
+        if head.startswith(magic):
+            return codec
+
+
+def _peek_stream(stream, size):
+    # Looking at the start of stdin must not consume any data.  Streams
+    # that can neither peek nor seek back are read uncompressed.
+    peek = getattr(stream, 'peek', None)
+    if peek is not None:
+        return peek(size)[:size]
+    seekable = getattr(stream, 'seekable', None)
+    if seekable is None or not seekable():
+        return b''
+    pos = stream.tell()
+    head = stream.read(size)
+    stream.seek(pos)
+    return head
+
+
+def _check_codec(codec):
+    # The bz2 module of Python 2 can only open files by name and the lzma
+    # module only exists on Python 3.3 and later.
+    if codec == 'bz2' and PY2:
+        raise IOError('bz2 compressed streams are not supported on '
+                      'Python 2')
+    if codec == 'xz':
+        try:
+            import lzma
+        except ImportError:
+            raise IOError('xz compression requires the lzma module')
+
+
+def _open_codec(codec, fileobj, mode, filename):
+    if codec == 'gzip':
+        import gzip
+        # The filename only ends up in the header of written files.
+        return gzip.GzipFile(filename=filename, mode=mode, fileobj=fileobj)
+    elif codec == 'bz2':
+        import bz2
+        return bz2.BZ2File(fileobj, mode)
+    import lzma
+    return lzma.LZMAFile(fileobj, mode)
+
+
+def _wrap_uncompressed(raw, mode, encoding, errors):
+    if 'b' in mode or (PY2 and encoding is None):
+        return raw
+    return io.TextIOWrapper(raw, encoding=encoding, errors=errors)
+
+
+def _open_compressed_stream(filename, mode, encoding, errors, atomic,
+                            compression, buffering):
+    # Returns `None` if the file turns out not to be compressed before it
+    # was opened, in which case it's opened the regular way.
+    if compression != 'auto' and \
+       compression not in _compression_extensions.values():
+        raise ValueError('Unknown compression %r' % compression)
+    codec = compression != 'auto' and compression or None
+    if codec is not None:
+        _check_codec(codec)
+    reading = 'r' in mode
+    binary_mode = mode.replace('b', '').replace('t', '') + 'b'
+    tmp_filename = None
+
+    # Writes pick the codec by the file extension, reads look at the
+    # first bytes of the stream so misnamed files are handled as well.
+    # The bytes are peeked at on the stream that is then used for reading
+    # as pipes cannot be opened a second time.
+    if filename == '-':
+        if reading:
+            raw = get_binary_stdin()
+            if codec is None:
+                codec = _sniff_compression(raw)
+                if codec is not None:
+                    _check_codec(codec)
+        else:
+            raw = get_binary_stdout()
+        if codec is None:
+            return None
+    else:
+        if codec is None and not reading:
+            ext = os.path.splitext(filename)[1]
+            codec = _compression_extensions.get(ext.lower())
+            if codec is None:
+                return None
+            _check_codec(codec)
+        if atomic:
+            import tempfile
+            fd, tmp_filename = tempfile.mkstemp(
+                dir=os.path.dirname(filename), prefix='.__atomic-write')
+            raw = io.open(fd, binary_mode, buffering)
+        else:
+            raw = io.open(filename, binary_mode, buffering)
+        if codec is None:
+            codec = _sniff_compression(raw)
+            if codec is None:
+                return _wrap_uncompressed(raw, mode, encoding, errors), True
+            try:
+                _check_codec(codec)
+            except IOError:
+                raw.close()
+                raise
+
+    f = _open_codec(codec, raw, binary_mode,
+                    filename != '-' and filename or '')
+    if 'b' not in mode and not (PY2 and encoding is None):
+        f = io.TextIOWrapper(f, encoding=encoding, errors=errors)
+
+    # The stream always needs closing as this writes out the end of the
+    # compressed data.  Standard streams stay open.
+    f = _CompressedFile(f, raw, filename, close_raw=filename != '-')
+    if tmp_filename is not None:
+        return _AtomicFile(f, tmp_filename, filename), True
+    return f, True
+
+
+def open_mapped(filename):
+    """Maps a file read-only into memory.  Returns `None` if the file
+    cannot be mapped (stdin, pipes, devices and empty files) in which case
+    the caller is supposed to fall back to a regular stream.
+    """
+    if filename == '-':
+        return None
+    import mmap
+    import stat
+    # The file is checked before it's opened as opening a fifo blocks
+    # until there is a writer and the fallback has to open it again.
+    st = os.stat(filename)
+    if not stat.S_ISREG(st.st_mode) or st.st_size == 0:
+        return None
+    f = open(filename, 'rb')
+    try:
+        # The mapping keeps its own reference to the file so the file
+        # object itself can be closed right away.
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    finally:
+        f.close()
+
+
 # Used in a destructor call, needs extra protection from interpreter cleanup.
 _rename = os.rename
 
@@ -451,12 +671,49 @@ class _AtomicFile(object):
         return repr(self._f)
 
 
+class _CompressedFile(object):
+
+    def __init__(self, f, raw, name, close_raw=True):
+        self._f = f
+        self._raw = raw
+        self._close_raw = close_raw
+        self.name = name
+
+    def close(self):
+        if self._f.closed:
+            return
+        self._f.close()
+        if self._close_raw:
+            self._raw.close()
+        else:
+            self._raw.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+    def __iter__(self):
+        return iter(self._f)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def __repr__(self):
+        return '<compressed %r>' % self._f
+
+
 auto_wrap_for_ansi = None
 colorama = None
 get_winterm_size = None
 
 
 def strip_ansi(value):
+    # Most strings do not contain escape codes, the regular expression is
+    # only needed for the ones that do.
+    if '\033' not in value:
+        return value
     return _ansi_re.sub('', value)
 
 
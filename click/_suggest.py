@@ -0,0 +1,104 @@
+"""
+    click._suggest
+    ~~~~~~~~~~~~~~
+
+    Finds the names that are close to a mistyped name to power the "did
+    you mean" hints of error messages.  The names are stored in a BK-tree
+    so a lookup only has to compare against a small fraction of them.
+"""
+
+
+def edit_distance(a, b):
+    """Returns the Levenshtein distance between two strings."""
+    # Names often share long prefixes and suffixes which do not change
+    # the distance, so they are stripped first.
+    limit = min(len(a), len(b))
+    prefix = 0
+    while prefix < limit and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    limit -= prefix
+    while suffix < limit and a[-1 - suffix] == b[-1 - suffix]:
+        suffix += 1
+    a = a[prefix:len(a) - suffix]
+    b = b[prefix:len(b) - suffix]
+
+    if len(a) < len(b):
+        a, b = b, a
+    if not b:
+        return len(a)
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1,
+                               current[j - 1] + 1,
+                               previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def default_max_distance(word):
+    """The maximum distance at which a name is still considered to be a
+    suggestion for the given word.
+    """
+    return min(3, max(1, len(word) // 3))
+
+
+class BKTree(object):
+    """A BK-tree over a set of names.  Every node stores its children by
+    their distance to the node which allows to skip whole subtrees during
+    a lookup.
+    """
+
+    def __init__(self, words=()):
+        self.root = None
+        for word in words:
+            self.add(word)
+
+    def add(self, word):
+        if self.root is None:
+            self.root = (word, {})
+            return
+        node = self.root
+        while 1:
+            distance = edit_distance(word, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (word, {})
+                return
+            node = child
+
+    def search(self, word, max_distance=None):
+        """Returns the names within the maximum distance of the word as
+        a list of ``(distance, name)`` tuples sorted by distance.
+        """
+        if max_distance is None:
+            max_distance = default_max_distance(word)
+        rv = []
+        if self.root is None:
+            return rv
+        stack = [self.root]
+        while stack:
+            name, children = stack.pop()
+            distance = edit_distance(word, name)
+            if distance <= max_distance:
+                rv.append((distance, name))
+            for child_distance, child in children.items():
+                if abs(child_distance - distance) <= max_distance:
+                    stack.append(child)
+        rv.sort()
+        return rv
+
+
+def get_suggestions(tree, word, limit=3):
+    """Returns up to `limit` names from the tree that are closest to the
+    word.
+    """
+    matches = tree.search(word)
+    if not matches:
+        return []
+    best = matches[0][0]
+    return [name for distance, name in matches if distance == best][:limit]
@@ -15,7 +15,7 @@ import time
 import math
 from ._compat import _default_text_stdout, range_type, PY2, isatty, \
      open_stream, strip_ansi, term_len, get_best_encoding, WIN
-from .utils import echo
+from .utils import echo, _flush_echo_buffer
 from .exceptions import ClickException
 
 
@@ -52,7 +52,8 @@ class ProgressBar(object):
     def __init__(self, iterable, length=None, fill_char='#', empty_char=' ',
                  bar_template='%(bar)s', info_sep='  ', show_eta=True,
                  show_percent=None, show_pos=False, item_show_func=None,
-                 label=None, file=None, color=None, width=30):
+                 label=None, file=None, color=None, width=30,
+                 refresh_interval=0.1, threaded=False):
         self.fill_char = fill_char
         self.empty_char = empty_char
         self.bar_template = bar_template
@@ -68,6 +69,7 @@ class ProgressBar(object):
         self.color = color
         self.width = width
         self.autowidth = width == 0
+        self.refresh_interval = refresh_interval
 
         if length is None:
             length = _length_hint(iterable)
@@ -87,24 +89,86 @@ class ProgressBar(object):
         self.entered = False
         self.current_item = None
         self.is_hidden = not isatty(self.file)
+        self.last_render = 0.0
+        self.render_pending = False
+        self._terminal_width = None
+        self._terminal_width_checked = 0.0
+
+        # In threaded mode the position is protected by a lock and only
+        # the renderer thread draws the bar.
+        self.threaded = threaded
+        self._lock = None
+        self._renderer = None
+        self._stop_rendering = None
+        self._shared_counters = []
+        if threaded:
+            import threading
+            self._lock = threading.Lock()
+            self._stop_rendering = threading.Event()
 
     def __enter__(self):
         self.entered = True
         self.render_progress()
+        if self.threaded and not self.is_hidden:
+            import threading
+            self._renderer = threading.Thread(target=self._render_loop)
+            self._renderer.daemon = True
+            self._renderer.start()
         return self
 
     def __exit__(self, exc_type, exc_value, tb):
+        if self.threaded:
+            self._stop_rendering.set()
+            if self._renderer is not None:
+                self._renderer.join()
+                self._renderer = None
+            self._collect_shared_counters()
+            self.render_pending = True
         self.render_finish()
 
     def __iter__(self):
         if not self.entered:
             raise RuntimeError('You need to use progress bars in a with block.')
-        self.render_progress()
+        if not self.threaded:
+            self.render_progress()
         return self
 
+    def _render_loop(self):
+        while 1:
+            self._stop_rendering.wait(self.refresh_interval)
+            if self._stop_rendering.is_set():
+                break
+            self._collect_shared_counters()
+            with self._lock:
+                self.render_progress()
+
+    def shared_counter(self):
+        """Returns a counter that child processes can use to advance the
+        bar by calling its ``update(n_steps)`` method.  It has to be handed
+        to the processes when they are started, for instance as argument
+        of :class:`multiprocessing.Process` or through the initializer of
+        a :class:`multiprocessing.Pool`.  Only threaded bars support this.
+        """
+        if not self.threaded:
+            raise RuntimeError('Shared counters require a threaded '
+                               'progress bar.')
+        counter = SharedCounter()
+        self._shared_counters.append(counter)
+        return counter
+
+    def _collect_shared_counters(self):
+        for counter in self._shared_counters:
+            n_steps = counter.collect()
+            if n_steps:
+                with self._lock:
+                    self.make_step(n_steps)
+
     def render_finish(self):
         if self.is_hidden:
             return
+        if self.render_pending:
+            self.render_progress()
+        _flush_echo_buffer()
         self.file.write(AFTER_BAR)
         self.file.flush()
 
@@ -177,20 +241,37 @@ class ProgressBar(object):
             'info': self.info_sep.join(info_bits)
         }).rstrip()
 
+    def get_terminal_width(self):
+        # Asking the terminal for its size is a syscall, so it's only done
+        # once a second.  Resizes are still picked up quickly enough.
+        now = time.time()
+        if self._terminal_width is None or \
+           now - self._terminal_width_checked >= 1.0:
+            from .termui import get_terminal_size
+            self._terminal_width = get_terminal_size()[0]
+            self._terminal_width_checked = now
+        return self._terminal_width
+
     def render_progress(self):
-        from .termui import get_terminal_size
+        self.last_render = time.time()
+        self.render_pending = False
 
         if self.is_hidden:
             echo(self.label, file=self.file, color=self.color)
+            _flush_echo_buffer()
             self.file.flush()
             return
 
+        # The bar is partially written with echo, output that is buffered
+        # needs to go out first and the bar itself must not be buffered.
+        _flush_echo_buffer()
+
         # Update width in case the terminal has been resized
         if self.autowidth:
             old_width = self.width
             self.width = 0
             clutter_length = term_len(self.format_progress_line())
-            new_width = max(0, get_terminal_size()[0] - clutter_length)
+            new_width = max(0, self.get_terminal_width() - clutter_length)
             if new_width < old_width:
                 self.file.write(BEFORE_BAR)
                 self.file.write(' ' * self.max_width)
@@ -208,22 +289,48 @@ class ProgressBar(object):
             self.max_width = line_len
         # Use echo here so that we get colorama support.
         echo(line, file=self.file, nl=False, color=self.color)
+        _flush_echo_buffer()
         self.file.write(' ' * (clear_width - line_len))
         self.file.flush()
 
-    def make_step(self):
-        self.pos += 1
+    def make_step(self, n_steps=1):
+        self.pos += n_steps
         if self.length_known and self.pos >= self.length:
             self.finished = True
 
-        if (time.time() - self.last_eta) < 1.0:
+        now = time.time()
+        if (now - self.last_eta) < 1.0:
             return
 
-        self.last_eta = time.time()
-        self.avg = self.avg[-6:] + [-(self.start - time.time()) / (self.pos)]
+        self.last_eta = now
+        self.avg = self.avg[-6:] + [-(self.start - now) / (self.pos)]
 
         self.eta_known = self.length_known
 
+    def render_throttled(self):
+        """Redraws the bar unless it was drawn less than `refresh_interval`
+        seconds ago.  The last state is always drawn.
+        """
+        if self.finished or \
+           time.time() - self.last_render >= self.refresh_interval:
+            self.render_progress()
+        else:
+            self.render_pending = True
+
+    def update(self, n_steps):
+        """Advances the bar by `n_steps`.  This is useful if the progress
+        is not tracked by iterating over the bar, and faster than advancing
+        item by item if many items are processed at once.  Threaded bars
+        can be updated from any thread.
+        """
+        if self._lock is not None:
+            with self._lock:
+                self.make_step(n_steps)
+            return
+        self.make_step(n_steps)
+        if not self.is_hidden:
+            self.render_throttled()
+
     def finish(self):
         self.eta_known = 0
         self.current_item = None
@@ -232,6 +339,8 @@ class ProgressBar(object):
     def next(self):
         if self.is_hidden:
             return next(self.iter)
+        if self._lock is not None:
+            return self._next_threaded()
         try:
             rv = next(self.iter)
             self.current_item = rv
@@ -241,14 +350,47 @@ class ProgressBar(object):
             raise StopIteration()
         else:
             self.make_step()
-            self.render_progress()
+            self.render_throttled()
             return rv
 
+    def _next_threaded(self):
+        try:
+            rv = next(self.iter)
+        except StopIteration:
+            with self._lock:
+                self.finish()
+            raise StopIteration()
+        with self._lock:
+            self.current_item = rv
+            self.make_step()
+        return rv
+
     if not PY2:
         __next__ = next
         del next
 
 
+class SharedCounter(object):
+    """A counter in shared memory through which child processes advance
+    a threaded :class:`ProgressBar`.
+    """
+
+    def __init__(self):
+        import multiprocessing
+        self.value = multiprocessing.Value('l', 0)
+
+    def update(self, n_steps):
+        with self.value.get_lock():
+            self.value.value += n_steps
+
+    def collect(self):
+        """Returns the steps since the last call and resets the counter."""
+        with self.value.get_lock():
+            rv = self.value.value
+            self.value.value = 0
+        return rv
+
+
 def pager(text, color=None):
     """Decide what method to use for paging through text."""
     stdout = _default_text_stdout()
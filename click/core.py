@@ -6,22 +6,28 @@ from itertools import chain, repeat
 from functools import update_wrapper
 
 from .types import convert_type, IntRange, BOOL
-from .utils import make_str, make_default_short_help, echo
-from .exceptions import ClickException, UsageError, BadParameter, Abort
-from .termui import prompt, confirm
-from .formatting import HelpFormatter, join_options
+from .utils import make_str, make_default_short_help, echo, \
+     import_string
+from .exceptions import ClickException, UsageError, BadParameter, Abort, \
+     NoSuchCommand
 from .parser import OptionParser, split_opt
+from .instrumentation import instrument, _start_env_profile, \
+     _finish_env_profile
 
 from ._compat import PY2, isidentifier, iteritems
 
 _missing = object()
 
+# The number of help pages that are cached per command.  Usually there is
+# only one but the help can be rendered for different terminal widths.
+_help_cache_size = 16
+
 
 SUBCOMMAND_METAVAR = 'COMMAND [ARGS]...'
 SUBCOMMANDS_METAVAR = 'COMMAND1 [ARGS]... [COMMAND2 [ARGS]...]...'
 
 
-def _bashcomplete(cmd, prog_name, complete_var=None):
+def _bashcomplete(cmd, prog_name, complete_var=None, manifest=None):
     """Internal handler for the bash completion support."""
     if complete_var is None:
         complete_var = '_%s_COMPLETE' % (prog_name.replace('-', '_')).upper()
@@ -30,7 +36,8 @@ def _bashcomplete(cmd, prog_name, complete_var=None):
         return
 
     from ._bashcomplete import bashcomplete
-    if bashcomplete(cmd, prog_name, complete_var, complete_instr):
+    if bashcomplete(cmd, prog_name, complete_var, complete_instr,
+                    manifest=manifest):
         sys.exit(1)
 
 
@@ -38,6 +45,67 @@ def batch(iterable, batch_size):
     return list(zip(*repeat(iter(iterable), batch_size)))
 
 
+def _is_awaitable(value):
+    return hasattr(type(value), '__await__')
+
+
+def _is_coroutine_function(func):
+    try:
+        from inspect import iscoroutinefunction
+    except ImportError:
+        return False
+    while func is not None:
+        if iscoroutinefunction(func):
+            return True
+        func = getattr(func, '__wrapped__', None)
+    return False
+
+
+def _run_awaitable(ctx, value):
+    """If the value is awaitable it's run on the event loop of the context
+    and the result is returned, otherwise the value is returned unchanged.
+    """
+    if not _is_awaitable(value):
+        return value
+    from ._asyncsupport import run_awaitable
+    return run_awaitable(ctx, value)
+
+
+_environment_verified = False
+
+
+def _verify_python3_env():
+    """Ensures that the environment is sane on Python 3.  The check only
+    succeeds once per process, later calls return immediately.
+    """
+    global _environment_verified
+    if PY2 or _environment_verified:
+        return
+    try:
+        import locale
+        fs_enc = codecs.lookup(locale.getpreferredencoding()).name
+    except Exception:
+        fs_enc = 'ascii'
+    if fs_enc == 'ascii':
+        raise RuntimeError('Click will abort further execution '
+                           'because Python 3 was configured to use '
+                           'ASCII as encoding for the environment. '
+                           'Either switch to Python 2 or consult '
+                           'http://click.pocoo.org/python3/ '
+                           'for mitigation steps.')
+    _environment_verified = True
+
+
+def _exit_code_from_system_exit(e):
+    code = e.code
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    sys.stderr.write('%s\n' % code)
+    return 1
+
+
 def invoke_param_callback(callback, ctx, param, value):
     code = getattr(callback, '__code__', None)
     args = getattr(code, 'co_argcount', 3)
@@ -49,8 +117,8 @@ def invoke_param_callback(callback, ctx, param, value):
                      'signature for such callbacks starting with '
                      'click 2.0 is (ctx, param, value).'
                      % callback), stacklevel=3)
-        return callback(ctx, value)
-    return callback(ctx, param, value)
+        return _run_awaitable(ctx, callback(ctx, value))
+    return _run_awaitable(ctx, callback(ctx, param, value))
 
 
 @contextmanager
@@ -77,16 +145,45 @@ def iter_params_for_processing(invocation_order, declaration_order):
     for processing and an iterable of parameters that exist, this returns
     a list in the correct order as they should be processed.
     """
+    # Remember where each parameter was seen first.  Parameters can show
+    # up many times in the invocation order (think ``multiple=True``), so
+    # looking them up with ``list.index`` would be quadratic.
+    first_seen = {}
+    for idx, item in enumerate(invocation_order):
+        if item not in first_seen:
+            first_seen[item] = idx
+
     def sort_key(item):
-        try:
-            idx = invocation_order.index(item)
-        except ValueError:
-            idx = float('inf')
-        return (not item.is_eager, idx)
+        return (not item.is_eager, first_seen.get(item, float('inf')))
 
     return sorted(declaration_order, key=sort_key)
 
 
+def _inherited_setting(name, default_factory=None, doc=None):
+    """Creates a property for a context setting that is inherited from the
+    parent context.  The value is only looked up in the parent chain when
+    it's first accessed and then remembered on the context.
+    """
+    attr = '_' + name
+
+    def fget(self):
+        rv = getattr(self, attr)
+        if rv is _missing:
+            if self.parent is not None:
+                rv = getattr(self.parent, name)
+            elif default_factory is not None:
+                rv = default_factory()
+            else:
+                rv = None
+            setattr(self, attr, rv)
+        return rv
+
+    def fset(self, value):
+        setattr(self, attr, value)
+
+    return property(fget, fset, doc=doc)
+
+
 class Context(object):
     """The context is a special internal object that holds state relevant
     for the script execution at every single level.  It's normally invisible
@@ -99,6 +196,14 @@ class Context(object):
     A context can be used as context manager in which case it will call
     :meth:`close` on teardown.
 
+    Settings that are inherited from the parent context (such as the
+    terminal width or the help option names) are only looked up in the
+    parent chain when they are first accessed.  Contexts use slots for
+    their attributes so creating many of them is cheap.
+
+    .. versionchanged:: 4.0
+       Inherited settings are resolved lazily and the context uses slots.
+
     .. versionadded:: 2.0
        Added the `resilient_parsing`, `help_option_names`,
        `token_normalize_func` parameters.
@@ -108,8 +213,8 @@ class Context(object):
        parameters.
 
     .. versionadded:: 4.0
-       Added the `color`, `ignore_unknown_options`, and
-       `max_content_width` parameters.
+       Added the `color`, `ignore_unknown_options`,
+       `max_content_width`, `manifest` and `event_loop` parameters.
 
     :param command: the command class for this context.
     :param parent: the parent context.
@@ -164,15 +269,36 @@ class Context(object):
                   codes are used in texts that Click prints which is by
                   default not the case.  This for instance would affect
                   help output.
+    :param manifest: an optional :class:`~click.manifest.CommandManifest`
+                     that is used to render command listings without
+                     loading the subcommands.  The default is to inherit
+                     from the parent context.
+    :param event_loop: the asyncio event loop that coroutine callbacks are
+                       run on.  The default is to use the loop of the
+                       parent context or to create a new loop for the
+                       root context when it's first needed.
     """
 
+    __slots__ = ('parent', 'command', 'info_name', 'params', 'args', 'obj',
+                 'default_map', 'invoked_subcommand', 'allow_extra_args',
+                 'allow_interspersed_args', 'ignore_unknown_options',
+                 'resilient_parsing', 'auto_envvar_prefix',
+                 '_terminal_width', '_max_content_width',
+                 '_help_option_names', '_token_normalize_func', '_color',
+                 '_manifest', 'event_loop', '_close_callbacks', '_depth',
+                 # Subclasses and user code might store extra attributes on
+                 # the context.  The dictionary is only created if that
+                 # actually happens.
+                 '__dict__', '__weakref__')
+
     def __init__(self, command, parent=None, info_name=None, obj=None,
                  auto_envvar_prefix=None, default_map=None,
                  terminal_width=None, max_content_width=None,
                  resilient_parsing=False, allow_extra_args=None,
                  allow_interspersed_args=None,
                  ignore_unknown_options=None, help_option_names=None,
-                 token_normalize_func=None, color=None):
+                 token_normalize_func=None, color=None, manifest=None,
+                 event_loop=None):
         #: the parent context or `None` if none exists.
         self.parent = parent
         #: the :class:`Command` for this context.
@@ -207,16 +333,18 @@ class Context(object):
         #: should use a :func:`resultcallback`.
         self.invoked_subcommand = None
 
-        if terminal_width is None and parent is not None:
-            terminal_width = parent.terminal_width
-        #: The width of the terminal (None is autodetection).
-        self.terminal_width = terminal_width
-
-        if max_content_width is None and parent is not None:
-            max_content_width = parent.max_content_width
-        #: The maximum width of formatted content (None implies a sensible
-        #: default which is 80 for most things).
-        self.max_content_width = max_content_width
+        # Inherited settings are stored as `_missing` and resolved from
+        # the parent on first access (see `_inherited_setting`).
+        self._terminal_width = _missing if terminal_width is None \
+            else terminal_width
+        self._max_content_width = _missing if max_content_width is None \
+            else max_content_width
+        self._help_option_names = _missing if help_option_names is None \
+            else help_option_names
+        self._token_normalize_func = _missing \
+            if token_normalize_func is None else token_normalize_func
+        self._color = _missing if color is None else color
+        self._manifest = _missing if manifest is None else manifest
 
         if allow_extra_args is None:
             allow_extra_args = command.allow_extra_args
@@ -246,22 +374,6 @@ class Context(object):
         #: .. versionadded:: 4.0
         self.ignore_unknown_options = ignore_unknown_options
 
-        if help_option_names is None:
-            if parent is not None:
-                help_option_names = parent.help_option_names
-            else:
-                help_option_names = ['--help']
-
-        #: The names for the help options.
-        self.help_option_names = help_option_names
-
-        if token_normalize_func is None and parent is not None:
-            token_normalize_func = parent.token_normalize_func
-
-        #: An optional normalization function for tokens.  This is
-        #: options, choices, commands etc.
-        self.token_normalize_func = token_normalize_func
-
         #: Indicates if resilient parsing is enabled.  In that case Click
         #: will do its best to not cause any failures.
         self.resilient_parsing = resilient_parsing
@@ -279,15 +391,33 @@ class Context(object):
             self.auto_envvar_prefix = auto_envvar_prefix.upper()
         self.auto_envvar_prefix = auto_envvar_prefix
 
-        if color is None and parent is not None:
-            color = parent.color
-
-        #: Controls if styling output is wanted or not.
-        self.color = color
+        #: The event loop for coroutine callbacks if this context has its
+        #: own.  Use the loop of the parent context if this is `None`.
+        #:
+        #: .. versionadded:: 4.0
+        self.event_loop = event_loop
 
         self._close_callbacks = []
         self._depth = 0
 
+    terminal_width = _inherited_setting('terminal_width', doc="""
+        The width of the terminal (None is autodetection).""")
+    max_content_width = _inherited_setting('max_content_width', doc="""
+        The maximum width of formatted content (None implies a sensible
+        default which is 80 for most things).""")
+    help_option_names = _inherited_setting(
+        'help_option_names', lambda: ['--help'], doc="""
+        The names for the help options.""")
+    token_normalize_func = _inherited_setting('token_normalize_func', doc="""
+        An optional normalization function for tokens.  This is options,
+        choices, commands etc.""")
+    color = _inherited_setting('color', doc="""
+        Controls if styling output is wanted or not.""")
+    manifest = _inherited_setting('manifest', doc="""
+        The command manifest that is used to answer command listings.
+
+        .. versionadded:: 4.0""")
+
     def __enter__(self):
         self._depth += 1
         return self
@@ -318,6 +448,7 @@ class Context(object):
 
     def make_formatter(self):
         """Creates the formatter for the help and usage output."""
+        from .formatting import HelpFormatter
         return HelpFormatter(width=self.terminal_width,
                              max_width=self.max_content_width)
 
@@ -335,8 +466,10 @@ class Context(object):
 
     def close(self):
         """Invokes all close callbacks."""
-        for cb in self._close_callbacks:
-            cb()
+        if self._close_callbacks:
+            with instrument('close', self):
+                for cb in self._close_callbacks:
+                    cb()
         self._close_callbacks = []
 
     @property
@@ -429,6 +562,14 @@ class Context(object):
         in against the intention of this code and no context was created.  For
         more information about this change and why it was done in a bugfix
         release see :ref:`upgrade-to-3.2`.
+
+        If the callback is a coroutine function it's run to completion on
+        the event loop of the context.  If this is called from a coroutine
+        that already runs on that loop the awaitable is returned instead
+        and needs to be awaited.
+
+        .. versionchanged:: 4.0
+           Added support for coroutine callbacks.
         """
         self, callback = args[:2]
         ctx = self
@@ -460,7 +601,9 @@ class Context(object):
         with augment_usage_errors(self):
             try:
                 with ctx:
-                    return callback(*args, **kwargs)
+                    with instrument('callback', ctx,
+                                    getattr(callback, '__name__', None)):
+                        return _run_awaitable(ctx, callback(*args, **kwargs))
             except TypeError as e:
                 if not injected_arguments:
                     raise
@@ -555,8 +698,15 @@ class BaseCommand(object):
         for key, value in iteritems(self.context_settings):
             if key not in extra:
                 extra[key] = value
-        ctx = Context(self, info_name=info_name, parent=parent, **extra)
-        self.parse_args(ctx, args)
+        # The context does not exist yet, so the command path it will have
+        # is built the same way for the event.
+        command_path = info_name or ''
+        if parent is not None:
+            command_path = (parent.command_path + ' ' + command_path).lstrip()
+        with instrument('make_context', command_path):
+            ctx = Context(self, info_name=info_name, parent=parent, **extra)
+            with instrument('parse_args', ctx):
+                self.parse_args(ctx, args)
         return ctx
 
     def parse_args(self, ctx, args):
@@ -606,23 +756,26 @@ class BaseCommand(object):
                                 of :meth:`invoke`.
         :param extra: extra keyword arguments are forwarded to the context
                       constructor.  See :class:`Context` for more information.
+
+        If the ``CLICK_PROFILE`` environment variable is set, the time spent
+        in the phases of the invocation is printed to stderr at the end
+        (see :mod:`click.instrumentation`).
         """
+        profile = _start_env_profile()
+        try:
+            return self._main(args, prog_name, complete_var,
+                              standalone_mode, extra)
+        finally:
+            if profile is not None:
+                _finish_env_profile(profile)
+
+    def _main(self, args, prog_name, complete_var, standalone_mode, extra,
+              complete=True):
         # If we are in Python 3, we will verify that the environment is
         # sane at this point of reject further execution to avoid a
         # broken script.
-        if not PY2:
-            try:
-                import locale
-                fs_enc = codecs.lookup(locale.getpreferredencoding()).name
-            except Exception:
-                fs_enc = 'ascii'
-            if fs_enc == 'ascii':
-                raise RuntimeError('Click will abort further execution '
-                                   'because Python 3 was configured to use '
-                                   'ASCII as encoding for the environment. '
-                                   'Either switch to Python 2 or consult '
-                                   'http://click.pocoo.org/python3/ '
-                                   'for mitigation steps.')
+        with instrument('environment', prog_name):
+            _verify_python3_env()
 
         if args is None:
             args = sys.argv[1:]
@@ -635,12 +788,18 @@ class BaseCommand(object):
         # Hook for the Bash completion.  This only activates if the Bash
         # completion is actually enabled, otherwise this is quite a fast
         # noop.
-        _bashcomplete(self, prog_name, complete_var)
+        if complete:
+            with instrument('completion', prog_name):
+                _bashcomplete(self, prog_name, complete_var,
+                              manifest=extra.get(
+                                  'manifest',
+                                  self.context_settings.get('manifest')))
 
         try:
             try:
                 with self.make_context(prog_name, args, **extra) as ctx:
-                    rv = self.invoke(ctx)
+                    with instrument('invoke', ctx):
+                        rv = self.invoke(ctx)
                     if not standalone_mode:
                         return rv
                     ctx.exit()
@@ -658,6 +817,126 @@ class BaseCommand(object):
             echo('Aborted!', file=sys.stderr)
             sys.exit(1)
 
+    def dispatch(self, args, prog_name=None, **extra):
+        """A lightweight version of :meth:`main` for invoking a command
+        repeatedly within the same process.  Errors are handled like in
+        standalone mode but instead of exiting the exit code is returned.
+        The checks that only need to happen once per process are skipped
+        on later invocations and the Bash completion is not handled.
+
+        .. versionadded:: 4.0
+
+        :param args: the arguments that should be used for parsing.
+        :param prog_name: the program name that should be used.  The
+                          default is the same as in :meth:`main`.
+        :param extra: extra keyword arguments are forwarded to the context
+                      constructor.
+        :return: the exit code.
+        """
+        try:
+            self._main(args, prog_name, None, True, extra, complete=False)
+        except SystemExit as e:
+            return _exit_code_from_system_exit(e)
+        return 0
+
+    def run_batch(self, lines, prog_name=None, report=None, workers=None,
+                  **extra):
+        """Executes many command lines within this process.  Each line
+        is split into arguments like a shell would do it and then invoked
+        like :meth:`main` in standalone mode would do.  Empty lines and
+        lines starting with ``#`` are skipped.  Errors are reported as
+        usual but do not stop the batch.
+
+        Example::
+
+            with open('jobs.txt') as f:
+                failed = cli.run_batch(f, report=sys.stderr)
+
+        .. versionadded:: 4.0
+
+        :param lines: an iterable of command lines, for instance a file
+                      object.
+        :param prog_name: the program name that should be used.  The
+                          default is the same as in :meth:`main`.
+        :param report: an optional text stream into which a JSON document
+                       is written for each executed line (one per line)
+                       with the keys ``line`` (the line number), ``args``,
+                       ``exit_code`` and ``duration`` (in seconds).
+        :param workers: if this is set to a number the lines are executed
+                        concurrently on a pool of this many threads.  The
+                        report is still written in the order of the lines.
+        :param extra: extra keyword arguments are forwarded to the context
+                      constructor.
+        :return: the number of lines that failed with a non zero exit code.
+        """
+        import json
+        from .parser import split_arg_string
+
+        if prog_name is None:
+            prog_name = make_str(os.path.basename(
+                sys.argv and sys.argv[0] or __file__))
+
+        def _execute(lineno, args):
+            import time
+            import traceback
+            start = time.time()
+            try:
+                code = self.dispatch(args, prog_name=prog_name, **extra)
+            except Exception:
+                traceback.print_exc()
+                code = 1
+            return {
+                'line': lineno,
+                'args': args,
+                'exit_code': code,
+                'duration': time.time() - start,
+            }
+
+        def _iter_jobs():
+            for lineno, line in enumerate(lines, 1):
+                line = line.strip()
+                if line and line[:1] != '#':
+                    yield lineno, split_arg_string(line)
+
+        def _iter_results():
+            if workers is None:
+                for lineno, args in _iter_jobs():
+                    yield _execute(lineno, args)
+                return
+            from collections import deque
+            from concurrent.futures import ThreadPoolExecutor
+            # Only a limited number of lines is read ahead so that memory
+            # use does not depend on the size of the batch.
+            pending = deque()
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for lineno, args in _iter_jobs():
+                    pending.append(executor.submit(_execute, lineno, args))
+                    if len(pending) >= workers * 4:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+
+        failed = 0
+        for result in _iter_results():
+            if result['exit_code'] != 0:
+                failed += 1
+            if report is not None:
+                report.write(json.dumps(result, sort_keys=True) + '\n')
+        if report is not None:
+            report.flush()
+        return failed
+
+    def main_async(self, *args, **extra):
+        """Like :meth:`main` but returns a coroutine that can be awaited
+        from an already running asyncio event loop.  The command is invoked
+        on a worker thread and coroutine callbacks are run on the calling
+        event loop.  This requires Python 3.5 or later.
+
+        .. versionadded:: 4.0
+        """
+        from ._asyncsupport import main_async
+        return main_async(self, args, extra)
+
     def __call__(self, *args, **kwargs):
         """Alias for :meth:`main`."""
         return self.main(*args, **kwargs)
@@ -704,6 +983,9 @@ class Command(BaseCommand):
             short_help = make_default_short_help(help)
         self.short_help = short_help
         self.add_help_option = add_help_option
+        self._help_option_cache = None
+        self._parser_cache = None
+        self._help_cache = {}
 
     def get_usage(self, ctx):
         formatter = ctx.make_formatter()
@@ -740,36 +1022,110 @@ class Command(BaseCommand):
         return all_names
 
     def get_help_option(self, ctx):
-        """Returns the help option object."""
+        """Returns the help option object.  The option is created once and
+        reused for as long as the help option names stay the same.
+        """
         help_options = self.get_help_option_names(ctx)
-        if not help_options:
-            return
+        key = frozenset(help_options)
+        cache = self._help_option_cache
+        if cache is not None and cache[0] == key:
+            return cache[1]
 
-        def show_help(ctx, param, value):
-            if value and not ctx.resilient_parsing:
-                echo(ctx.get_help(), color=ctx.color)
-                ctx.exit()
-        return Option(help_options, is_flag=True,
-                      is_eager=True, expose_value=False,
-                      callback=show_help,
-                      help='Show this message and exit.')
+        if not help_options:
+            rv = None
+        else:
+            def show_help(ctx, param, value):
+                if value and not ctx.resilient_parsing:
+                    echo(ctx.get_help(), color=ctx.color)
+                    ctx.exit()
+            rv = Option(help_options, is_flag=True,
+                        is_eager=True, expose_value=False,
+                        callback=show_help,
+                        help='Show this message and exit.')
+        self._help_option_cache = (key, rv)
+        return rv
 
     def make_parser(self, ctx):
-        """Creates the underlying option parser for this command."""
+        """Creates the underlying option parser for this command.
+
+        The option tables of the parser are only built the first time and
+        are then cached on the command.  Later calls return a parser bound
+        to the new context that shares the cached tables (see
+        :meth:`OptionParser.bind`).  The cache is invalidated if the
+        parameters returned by :meth:`get_params` for the context or the
+        token normalization function change.
+        """
+        params = self.get_params(ctx)
+        key = (tuple(params), ctx.token_normalize_func)
+        cache = self._parser_cache
+        if cache is not None and cache[0] == key:
+            return cache[1].bind(ctx)
+
         parser = OptionParser(ctx)
         parser.allow_interspersed_args = ctx.allow_interspersed_args
         parser.ignore_unknown_options = ctx.ignore_unknown_options
-        for param in self.get_params(ctx):
+        for param in params:
             param.add_to_parser(parser, ctx)
+        # Only an unbound copy goes into the cache so that the command
+        # does not keep the context of the first invocation alive.
+        self._parser_cache = (key, parser.bind(None))
         return parser
 
     def get_help(self, ctx):
         """Formats the help into a string and returns it.  This creates a
         formatter and will call into the following formatting methods:
+
+        The rendered help is cached on the command and reused for contexts
+        that produce the same help page (see :meth:`get_help_cache_key`).
+        If the help depends on anything else, the cache needs to be cleared
+        with :meth:`invalidate_help_cache`.
         """
         formatter = ctx.make_formatter()
+        key = self.get_help_cache_key(ctx, formatter)
+        if key is not None:
+            rv = self._help_cache.get(key)
+            if rv is not None:
+                return rv
         self.format_help(ctx, formatter)
-        return formatter.getvalue().rstrip('\n')
+        rv = formatter.getvalue().rstrip('\n')
+        if key is None:
+            return rv
+        if len(self._help_cache) >= _help_cache_size:
+            self._help_cache.clear()
+        self._help_cache[key] = rv
+        return rv
+
+    def get_help_cache_key(self, ctx, formatter):
+        """Returns the key under which the help page for the given context
+        and formatter is cached.  Subclasses that render help that depends
+        on more information can override this to extend the key or return
+        `None` to not cache the help page at all.
+
+        .. versionadded:: 4.0
+        """
+        return (ctx.command_path, formatter.width, ctx.max_content_width,
+                ctx.color, tuple(self.get_params(ctx)), self.help,
+                self.epilog, self.options_metavar)
+
+    def invalidate_help_cache(self):
+        """Clears the cached help pages of this command.  This needs to be
+        called if something changes that the help page depends on but that
+        is not part of the cache key, for instance if the help text of a
+        parameter is modified in place.
+
+        .. versionadded:: 4.0
+        """
+        self._help_cache.clear()
+
+    def prerender_help(self, ctx):
+        """Renders the help page of this command and returns it in a
+        dictionary keyed by the command path.  For multi commands this
+        includes the help pages of all subcommands.  As the help pages
+        are cached this can be used to warm up the cache in advance.
+
+        .. versionadded:: 4.0
+        """
+        return {ctx.command_path: self.get_help(ctx)}
 
     def format_help(self, ctx, formatter):
         """Writes the help into the formatter if it exists.
@@ -858,13 +1214,25 @@ class MultiCommand(Command):
                   multiple commands to be chained together.
     :param result_callback: the result callback to attach to this multi
                             command.
+    :param stream_chain: if this is set to `True` in chain mode, every
+                         subcommand is parsed and invoked before the next
+                         one is looked at and the result callback is
+                         invoked with an iterator over the results instead
+                         of a list.  See :ref:`streaming-chains`.
+    :param chain_workers: if this is set to a number in chain mode, the
+                          subcommands are invoked concurrently on a pool
+                          of this many threads.  See :ref:`parallel-chains`.
+
+    .. versionadded:: 4.0
+       Added the `stream_chain` and `chain_workers` parameters.
     """
     allow_extra_args = True
     allow_interspersed_args = False
 
     def __init__(self, name=None, invoke_without_command=False,
                  no_args_is_help=None, subcommand_metavar=None,
-                 chain=False, result_callback=None, **attrs):
+                 chain=False, result_callback=None, stream_chain=False,
+                 chain_workers=None, **attrs):
         Command.__init__(self, name, **attrs)
         if no_args_is_help is None:
             no_args_is_help = not invoke_without_command
@@ -877,6 +1245,12 @@ class MultiCommand(Command):
                 subcommand_metavar = SUBCOMMAND_METAVAR
         self.subcommand_metavar = subcommand_metavar
         self.chain = chain
+        if stream_chain and chain_workers is not None:
+            raise TypeError('Streaming chains cannot be executed in '
+                            'parallel.')
+        self.stream_chain = stream_chain
+        self.chain_workers = chain_workers
+        self._command_index = None
         #: The result callback that is stored.  This can be set or
         #: overridden with the :func:`resultcallback` decorator.
         self.result_callback = result_callback
@@ -927,24 +1301,54 @@ class MultiCommand(Command):
             return rv
         return decorator
 
+    def get_help_cache_key(self, ctx, formatter):
+        return Command.get_help_cache_key(self, ctx, formatter) + \
+            (tuple(self.list_commands(ctx)), ctx.manifest)
+
+    def prerender_help(self, ctx):
+        rv = Command.prerender_help(self, ctx)
+        for name in self.list_commands(ctx):
+            cmd = self.get_command(ctx, name)
+            if cmd is None:
+                continue
+            sub_ctx = Context(cmd, info_name=name, parent=ctx,
+                              resilient_parsing=True)
+            if isinstance(cmd, Command):
+                rv.update(cmd.prerender_help(sub_ctx))
+            else:
+                rv[sub_ctx.command_path] = cmd.get_help(sub_ctx)
+        return rv
+
     def format_commands(self, ctx, formatter):
         """Extra format methods for multi methods that adds all the commands
-        after the options.
+        after the options.  If the context has a manifest that knows about
+        this command the listing is rendered from the manifest.
         """
         rows = []
-        for subcommand in self.list_commands(ctx):
-            cmd = self.get_command(ctx, subcommand)
-            # What is this, the tool lied about a command.  Ignore it
-            if cmd is None:
-                continue
-
-            help = cmd.short_help or ''
-            rows.append((subcommand, help))
+        node = None
+        if ctx.manifest is not None:
+            node = ctx.manifest.find_node_for_context(ctx)
+        if node is not None:
+            for subcommand in node['commands'] or ():
+                rows.append((subcommand['name'],
+                             subcommand['short_help'] or ''))
+        else:
+            rows = self._collect_command_rows(ctx)
 
         if rows:
             with formatter.section('Commands'):
                 formatter.write_dl(rows)
 
+    def _collect_command_rows(self, ctx):
+        rows = []
+        for subcommand in self.list_commands(ctx):
+            help = self.get_command_short_help(ctx, subcommand)
+            # What is this, the tool lied about a command.  Ignore it
+            if help is None:
+                continue
+            rows.append((subcommand, help))
+        return rows
+
     def parse_args(self, ctx, args):
         if not args and self.no_args_is_help and not ctx.resilient_parsing:
             echo(ctx.get_help(), color=ctx.color)
@@ -998,6 +1402,22 @@ class MultiCommand(Command):
             ctx.invoked_subcommand = args and '*' or None
             Command.invoke(self, ctx)
 
+            # In streaming mode the result processor gets an iterator that
+            # parses and invokes one subcommand at the time.  Whatever it
+            # does not consume is executed afterwards.
+            if self.stream_chain:
+                results = self._iter_chain(ctx, args)
+                try:
+                    if self.result_callback is None:
+                        rv = None
+                    else:
+                        rv = _process_result(results)
+                    for _ in results:
+                        pass
+                finally:
+                    results.close()
+                return rv
+
             # Otherwise we make every single context and invoke them in a
             # chain.  In that case the return value to the result processor
             # is the list of all invoked subcommand's results.
@@ -1010,12 +1430,76 @@ class MultiCommand(Command):
                 contexts.append(sub_ctx)
                 args = sub_ctx.args
 
+            if self.chain_workers is not None:
+                return _process_result(self._invoke_chain_parallel(contexts))
+
             rv = []
             for sub_ctx in contexts:
                 with sub_ctx:
                     rv.append(sub_ctx.command.invoke(sub_ctx))
             return _process_result(rv)
 
+    def _invoke_chain_parallel(self, contexts):
+        # If all subcommands are coroutines they are run concurrently on
+        # the event loop instead of on threads.
+        if all(_is_coroutine_function(x.command.callback)
+               for x in contexts):
+            from ._asyncsupport import gather_chain
+            return gather_chain(contexts[0].parent, contexts,
+                                self.chain_workers)
+
+        try:
+            from concurrent.futures import ThreadPoolExecutor, wait, \
+                 FIRST_EXCEPTION
+        except ImportError:
+            raise RuntimeError('Parallel chains require the '
+                               'concurrent.futures module.  On Python 2 '
+                               'it is available as the "futures" package.')
+
+        def _invoke(sub_ctx):
+            with sub_ctx:
+                return sub_ctx.command.invoke(sub_ctx)
+
+        # Coroutines of different threads share the event loop which is
+        # kept running on its own thread while the subcommands run.
+        stop_loop = None
+        if any(_is_coroutine_function(x.command.callback) for x in contexts):
+            from ._asyncsupport import run_loop_in_thread
+            stop_loop = run_loop_in_thread(contexts[0].parent)
+
+        executor = ThreadPoolExecutor(max_workers=self.chain_workers)
+        futures = [executor.submit(_invoke, x) for x in contexts]
+        try:
+            # As soon as one subcommand fails, the ones that did not start
+            # yet are cancelled and the exception is propagated once the
+            # running ones finished.  If several failed by then, the one
+            # that comes first in the chain wins.
+            done = wait(futures, return_when=FIRST_EXCEPTION)[0]
+            for future in futures:
+                if future in done and future.exception() is not None:
+                    future.result()
+            return [future.result() for future in futures]
+        finally:
+            # Subcommands that never started still need their contexts to
+            # be closed as parsing might have registered resources.
+            for sub_ctx, future in zip(contexts, futures):
+                if future.cancel():
+                    sub_ctx.close()
+            executor.shutdown(wait=True)
+            if stop_loop is not None:
+                stop_loop()
+
+    def _iter_chain(self, ctx, args):
+        while args:
+            cmd_name, cmd, args = self.resolve_command(ctx, args)
+            sub_ctx = cmd.make_context(cmd_name, args, parent=ctx,
+                                       allow_extra_args=True,
+                                       allow_interspersed_args=False)
+            args = sub_ctx.args
+            with sub_ctx:
+                rv = sub_ctx.command.invoke(sub_ctx)
+            yield rv
+
     def resolve_command(self, ctx, args):
         cmd_name = make_str(args[0])
         original_cmd_name = cmd_name
@@ -1038,10 +1522,19 @@ class MultiCommand(Command):
         if cmd is None:
             if split_opt(cmd_name)[0]:
                 self.parse_args(ctx, ctx.args)
-            ctx.fail('No such command "%s".' % original_cmd_name)
+            raise NoSuchCommand(original_cmd_name, ctx=ctx,
+                                possibilities=self._get_command_suggestions(
+                                    ctx, original_cmd_name))
 
         return cmd_name, cmd, args[1:]
 
+    def _get_command_suggestions(self, ctx, cmd_name):
+        from ._suggest import BKTree, get_suggestions
+        names = tuple(self.list_commands(ctx))
+        if self._command_index is None or self._command_index[0] != names:
+            self._command_index = (names, BKTree(names))
+        return get_suggestions(self._command_index[1], cmd_name)
+
     def get_command(self, ctx, cmd_name):
         """Given a context and a command name, this returns a
         :class:`Command` object if it exists or returns `None`.
@@ -1054,11 +1547,29 @@ class MultiCommand(Command):
         """
         return []
 
+    def get_command_short_help(self, ctx, cmd_name):
+        """Returns the short help of a subcommand as it is shown in the
+        command listing of the help page or `None` if the command does not
+        exist.  The default implementation loads the command through
+        :meth:`get_command`.  Subclasses can override this to provide the
+        short help without having to load the command.
+
+        .. versionadded:: 4.0
+        """
+        cmd = self.get_command(ctx, cmd_name)
+        if cmd is None:
+            return None
+        return cmd.short_help or ''
+
 
 class Group(MultiCommand):
     """A group allows a command to have subcommands attached.  This is the
     most common way to implement nesting in Click.
 
+    Subcommands can also be registered lazily by import string through
+    :meth:`add_lazy_command` in which case they are only imported when
+    they are actually needed.
+
     :param commands: a dictionary of commands.
     """
 
@@ -1066,6 +1577,12 @@ class Group(MultiCommand):
         MultiCommand.__init__(self, name, **attrs)
         #: the registered subcommands by their exported names.
         self.commands = commands or {}
+        #: the lazily registered subcommands that were not imported yet.
+        #: This maps the exported names to ``(import_name, short_help)``
+        #: tuples.
+        #:
+        #: .. versionadded:: 4.0
+        self.lazy_commands = {}
 
     def add_command(self, cmd, name=None):
         """Registers another :class:`Command` with this group.  If the name
@@ -1074,7 +1591,40 @@ class Group(MultiCommand):
         name = name or cmd.name
         if name is None:
             raise TypeError('Command has no name.')
+        self.lazy_commands.pop(name, None)
         self.commands[name] = cmd
+        self.invalidate_help_cache()
+
+    def add_lazy_command(self, import_name, name, short_help=None):
+        """Registers a command by import string (for instance
+        ``'mypackage.commands.sync:cli'``).  The command is only imported
+        once it is looked up through :meth:`get_command` which means that
+        invoking another subcommand does not pay for importing it.
+
+        The `short_help` is used for the command listing on the help page
+        so that rendering the help page does not need to import the
+        command either.  If it's not provided the command is imported to
+        find its short help.
+
+        .. versionadded:: 4.0
+
+        :param import_name: the import string of the command object.
+        :param name: the name of the command.
+        :param short_help: the short help for the command listing.
+        """
+        self.commands.pop(name, None)
+        self.lazy_commands[name] = (import_name, short_help)
+        self.invalidate_help_cache()
+
+    def _load_lazy_command(self, cmd_name):
+        import_name = self.lazy_commands[cmd_name][0]
+        cmd = import_string(import_name)
+        if not isinstance(cmd, BaseCommand):
+            raise TypeError('Lazily registered command %r (%s) is not a '
+                            'command.' % (cmd_name, import_name))
+        self.commands[cmd_name] = cmd
+        self.lazy_commands.pop(cmd_name, None)
+        return cmd
 
     def command(self, *args, **kwargs):
         """A shortcut decorator for declaring and attaching a command to
@@ -1101,10 +1651,19 @@ class Group(MultiCommand):
         return decorator
 
     def get_command(self, ctx, cmd_name):
-        return self.commands.get(cmd_name)
+        rv = self.commands.get(cmd_name)
+        if rv is None and cmd_name in self.lazy_commands:
+            rv = self._load_lazy_command(cmd_name)
+        return rv
 
     def list_commands(self, ctx):
-        return sorted(self.commands)
+        return sorted(set(self.commands) | set(self.lazy_commands))
+
+    def get_command_short_help(self, ctx, cmd_name):
+        lazy = self.lazy_commands.get(cmd_name)
+        if lazy is not None and lazy[1] is not None:
+            return lazy[1]
+        return MultiCommand.get_command_short_help(self, ctx, cmd_name)
 
 
 class CommandCollection(MultiCommand):
@@ -1135,6 +1694,12 @@ class CommandCollection(MultiCommand):
             rv.update(source.list_commands(ctx))
         return sorted(rv)
 
+    def get_command_short_help(self, ctx, cmd_name):
+        for source in self.sources:
+            rv = source.get_command_short_help(ctx, cmd_name)
+            if rv is not None:
+                return rv
+
 
 class Parameter(object):
     """A parameter to a command comes in two versions: they are either
@@ -1292,21 +1857,22 @@ class Parameter(object):
         return rv
 
     def handle_parse_result(self, ctx, opts, args):
-        with augment_usage_errors(ctx, param=self):
-            value = self.consume_value(ctx, opts)
-            try:
-                value = self.full_process_value(ctx, value)
-            except Exception:
-                if not ctx.resilient_parsing:
-                    raise
-                value = None
-            if self.callback is not None:
+        with instrument('parameter', ctx, self.name):
+            with augment_usage_errors(ctx, param=self):
+                value = self.consume_value(ctx, opts)
                 try:
-                    value = invoke_param_callback(
-                        self.callback, ctx, self, value)
+                    value = self.full_process_value(ctx, value)
                 except Exception:
                     if not ctx.resilient_parsing:
                         raise
+                    value = None
+                if self.callback is not None:
+                    try:
+                        value = invoke_param_callback(
+                            self.callback, ctx, self, value)
+                    except Exception:
+                        if not ctx.resilient_parsing:
+                            raise
 
         if self.expose_value:
             ctx.params[self.name] = value
@@ -1492,6 +2058,7 @@ class Option(Parameter):
             parser.add_option(self.opts, **kwargs)
 
     def get_help_record(self, ctx):
+        from .formatting import join_options
         any_prefix_is_slash = []
 
         def _write_opts(opts):
@@ -1538,6 +2105,8 @@ class Option(Parameter):
         user until a valid value exists and then returns the processed
         value as result.
         """
+        from .termui import prompt, confirm
+
         # Calculate the default before prompting anything to be stable.
         default = self.get_default(ctx)
 
@@ -110,6 +110,33 @@ class NoSuchOption(UsageError):
         return '  '.join(bits)
 
 
+class NoSuchCommand(UsageError):
+    """Raised if a multi command was asked to invoke a subcommand that
+    does not exist.
+
+    .. versionadded:: 4.0
+    """
+
+    def __init__(self, command_name, message=None, possibilities=None,
+                 ctx=None):
+        if message is None:
+            message = 'No such command "%s".' % command_name
+        UsageError.__init__(self, message, ctx)
+        self.command_name = command_name
+        self.possibilities = possibilities
+
+    def format_message(self):
+        bits = [self.message]
+        if self.possibilities:
+            if len(self.possibilities) == 1:
+                bits.append('Did you mean "%s"?' % self.possibilities[0])
+            else:
+                possibilities = sorted(self.possibilities)
+                bits.append('(Possible commands: %s)'
+                            % ', '.join(possibilities))
+        return '  '.join(bits)
+
+
 class BadOptionUsage(UsageError):
     """Raised if an option is generally supplied but the use of the option
     was incorrect.  This is for instance raised if the number of arguments
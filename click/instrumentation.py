@@ -0,0 +1,165 @@
+"""
+    click.instrumentation
+    ~~~~~~~~~~~~~~~~~~~~~
+
+    Emits timing events for the phases of an invocation (context creation,
+    parsing, parameter processing, callbacks, ...) to registered sinks.
+    If no sink is registered the instrumentation points do nothing.
+
+    :copyright: (c) 2014 by Armin Ronacher.
+    :license: BSD, see LICENSE for more details.
+"""
+import os
+
+
+_sinks = []
+
+
+def _timer():
+    import time
+    return getattr(time, 'perf_counter', time.time)()
+
+
+class Event(object):
+    """Describes a single timed phase of an invocation.  Sinks are invoked
+    with instances of this class.
+
+    .. versionadded:: 4.0
+    """
+    __slots__ = ('phase', 'command_path', 'name', 'duration')
+
+    def __init__(self, phase, command_path, name, duration):
+        #: The phase that was timed.  This is one of ``'environment'``,
+        #: ``'completion'``, ``'make_context'``, ``'parse_args'``,
+        #: ``'parameter'``, ``'invoke'``, ``'callback'`` and ``'close'``.
+        self.phase = phase
+        #: The command path of the context the phase belongs to.
+        self.command_path = command_path
+        #: Additional information about the phase, for instance the name
+        #: of the parameter or the callback.  Might be `None`.
+        self.name = name
+        #: The duration of the phase in seconds.
+        self.duration = duration
+
+    def __repr__(self):
+        return '<Event %s %r %r %.6fs>' % (self.phase, self.command_path,
+                                            self.name, self.duration)
+
+
+def add_sink(sink):
+    """Registers a sink.  A sink is a callable that is invoked with an
+    :class:`Event` for every phase that finished.  Returns the sink so this
+    can be used as a decorator.
+
+    .. versionadded:: 4.0
+    """
+    _sinks.append(sink)
+    return sink
+
+
+def remove_sink(sink):
+    """Unregisters a sink that was registered with :func:`add_sink`.
+
+    .. versionadded:: 4.0
+    """
+    try:
+        _sinks.remove(sink)
+    except ValueError:
+        pass
+
+
+class _NoopSpan(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        pass
+
+
+_noop_span = _NoopSpan()
+
+
+class _Span(object):
+    __slots__ = ('phase', 'source', 'name', 'start')
+
+    def __init__(self, phase, source, name):
+        self.phase = phase
+        self.source = source
+        self.name = name
+
+    def __enter__(self):
+        self.start = _timer()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        duration = _timer() - self.start
+        command_path = getattr(self.source, 'command_path', self.source)
+        event = Event(self.phase, command_path, self.name, duration)
+        for sink in list(_sinks):
+            sink(event)
+
+
+def instrument(phase, source=None, name=None):
+    """Returns a context manager that times the phase it wraps and emits
+    an :class:`Event` to all registered sinks.  The `source` is either a
+    :class:`~click.Context` or a command path.  If no sinks are registered
+    this returns a shared object that does nothing.
+
+    .. versionadded:: 4.0
+    """
+    if not _sinks:
+        return _noop_span
+    return _Span(phase, source, name)
+
+
+class ProfileSink(object):
+    """A sink that sums up the time spent in each phase and can print it
+    as a table.  Nested phases are included in the time of the phases that
+    contain them.  If the ``CLICK_PROFILE`` environment variable is set,
+    :meth:`~click.BaseCommand.main` registers such a sink for the
+    invocation and prints the table to stderr at the end.
+
+    .. versionadded:: 4.0
+
+    :param file: the file to print the table to.  Defaults to stderr.
+    """
+
+    def __init__(self, file=None):
+        self.file = file
+        self.totals = {}
+
+    def __call__(self, event):
+        key = (event.phase, event.command_path, event.name)
+        count, total = self.totals.get(key, (0, 0.0))
+        self.totals[key] = (count + 1, total + event.duration)
+
+    def format_table(self):
+        """Returns the collected timings as a string."""
+        rows = [('phase', 'command', 'name', 'calls', 'total ms')]
+        for (phase, command_path, name), (count, total) in sorted(
+                self.totals.items(), key=lambda x: -x[1][1]):
+            rows.append((phase, command_path or '', name or '', str(count),
+                         '%.3f' % (total * 1000)))
+        widths = [max(len(row[idx]) for row in rows)
+                  for idx in range(len(rows[0]))]
+        return '\n'.join('  '.join(col.ljust(width) for col, width
+                                   in zip(row, widths)).rstrip()
+                         for row in rows)
+
+    def report(self):
+        """Prints the table."""
+        from .utils import echo
+        echo(self.format_table(), file=self.file, err=self.file is None)
+
+
+def _start_env_profile():
+    if os.environ.get('CLICK_PROFILE', '0') in ('', '0'):
+        return None
+    return add_sink(ProfileSink())
+
+
+def _finish_env_profile(sink):
+    remove_sink(sink)
+    sink.report()
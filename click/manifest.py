@@ -0,0 +1,294 @@
+"""
+    click.manifest
+    ~~~~~~~~~~~~~~
+
+    Implements a cache for the structure of a command tree.  Rendering the
+    command listing of a help page or completing a command line normally
+    requires loading every subcommand which for plugin heavy applications
+    means importing a lot of code.  A manifest records the names, parameters
+    and short help of all commands in a file so that this information can
+    be answered without importing anything.
+
+    :copyright: (c) 2014 by Armin Ronacher.
+    :license: BSD, see LICENSE for more details.
+"""
+import os
+import sys
+import json
+
+from .core import Context, MultiCommand, Command, Option
+from .types import Choice
+
+
+#: The version of the manifest format.  Manifests written with a different
+#: version are ignored when loaded.
+MANIFEST_VERSION = 1
+
+
+def _click_version():
+    return sys.modules[__name__.rsplit('.', 1)[0]].__version__
+
+
+def _get_source_filename(obj):
+    module = sys.modules.get(getattr(obj, '__module__', None) or '')
+    filename = getattr(module, '__file__', None)
+    if filename is None:
+        return None
+    if filename.endswith(('.pyc', '.pyo')) and \
+       os.path.isfile(filename[:-1]):
+        filename = filename[:-1]
+    return os.path.abspath(filename)
+
+
+def _get_mtime(filename):
+    try:
+        return os.stat(filename).st_mtime
+    except OSError:
+        return None
+
+
+def _dump_param(param, ctx):
+    if isinstance(param, Option):
+        kind = 'option'
+        takes_value = not param.is_flag and not param.count
+    else:
+        kind = 'argument'
+        takes_value = True
+    choices = None
+    if isinstance(param.type, Choice):
+        choices = list(param.type.choices)
+    return {
+        'kind': kind,
+        'name': param.name,
+        'opts': list(param.opts),
+        'secondary_opts': list(param.secondary_opts),
+        'metavar': param.make_metavar(),
+        'nargs': param.nargs,
+        'multiple': bool(param.multiple),
+        'takes_value': takes_value,
+        'choices': choices,
+    }
+
+
+def _dump_command(cmd, ctx, sources):
+    for obj in cmd, getattr(cmd, 'callback', None):
+        if obj is None:
+            continue
+        filename = _get_source_filename(obj)
+        if filename is not None and filename not in sources:
+            sources[filename] = _get_mtime(filename)
+
+    node = {
+        'name': ctx.info_name,
+        'short_help': getattr(cmd, 'short_help', None),
+        'params': [],
+        'commands': None,
+        'chain': False,
+    }
+    if isinstance(cmd, Command):
+        node['params'] = [_dump_param(x, ctx) for x in cmd.get_params(ctx)]
+    if isinstance(cmd, MultiCommand):
+        node['chain'] = cmd.chain
+        node['commands'] = commands = []
+        for name in cmd.list_commands(ctx):
+            subcmd = cmd.get_command(ctx, name)
+            if subcmd is None:
+                continue
+            sub_ctx = Context(subcmd, info_name=name, parent=ctx,
+                              resilient_parsing=True)
+            commands.append(_dump_command(subcmd, sub_ctx, sources))
+    return node
+
+
+class CommandManifest(object):
+    """A manifest holds the structure of a command tree: the names,
+    parameters, options, metavars, choices and short help of every command.
+    Manifests are created with :meth:`build` (which loads every command)
+    and can be stored in a file and loaded again later without importing
+    any commands.
+
+    To make a command use the manifest it's passed to the context, for
+    instance through the context settings or as extra argument to
+    :meth:`~click.BaseCommand.main`::
+
+        from click.manifest import load_or_build
+
+        def main():
+            manifest = load_or_build('/tmp/mytool-manifest.json', cli)
+            cli(manifest=manifest)
+
+    The manifest keeps track of the modification times of the source files
+    of all commands.  If any of them changes the manifest is considered
+    stale and :meth:`load` refuses to load it.
+
+    .. versionadded:: 4.0
+
+    :param tree: the root node of the command tree.
+    :param sources: a dictionary of filenames to modification times.
+    :param key: an arbitrary string that must match when the manifest is
+                loaded again.  This can for instance be used to encode the
+                versions of installed plugins.
+    """
+
+    def __init__(self, tree, sources=None, key=None):
+        self.tree = tree
+        self.sources = sources or {}
+        self.key = key
+
+    @classmethod
+    def build(cls, cli, info_name=None, key=None, sources=()):
+        """Builds a manifest for the given command by loading all of its
+        subcommands.
+
+        :param cli: the root command.
+        :param info_name: the info name for the root command.
+        :param key: see the class documentation.
+        :param sources: extra filenames whose modification time should
+                        be tracked.
+        """
+        tracked = {}
+        for filename in sources:
+            filename = os.path.abspath(filename)
+            tracked[filename] = _get_mtime(filename)
+        ctx = Context(cli, info_name=info_name or cli.name,
+                      resilient_parsing=True)
+        tree = _dump_command(cli, ctx, tracked)
+        return cls(tree, tracked, key)
+
+    @classmethod
+    def load(cls, filename, key=None):
+        """Loads a manifest from a file.  If the file does not exist, was
+        written by a different version of Click, with a different key or
+        if it's stale, `None` is returned.
+        """
+        try:
+            with open(filename) as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or \
+           data.get('version') != MANIFEST_VERSION or \
+           data.get('click_version') != _click_version() or \
+           data.get('key') != key:
+            return None
+        rv = cls(data['tree'], data['sources'], key)
+        if rv.is_stale():
+            return None
+        return rv
+
+    def save(self, filename):
+        """Saves the manifest to a file.  The file is written atomically."""
+        data = {
+            'version': MANIFEST_VERSION,
+            'click_version': _click_version(),
+            'key': self.key,
+            'sources': self.sources,
+            'tree': self.tree,
+        }
+        tmp_filename = '%s.%d.tmp' % (filename, os.getpid())
+        with open(tmp_filename, 'w') as f:
+            json.dump(data, f)
+        try:
+            os.rename(tmp_filename, filename)
+        except OSError:
+            # Windows cannot rename over existing files.
+            os.remove(filename)
+            os.rename(tmp_filename, filename)
+
+    def is_stale(self):
+        """Checks if any of the tracked source files changed."""
+        for filename, mtime in self.sources.items():
+            if _get_mtime(filename) != mtime:
+                return True
+        return False
+
+    def find_node(self, path):
+        """Finds the node of a command by the list of subcommand names
+        that lead to it from the root command.  Returns `None` if the
+        command is not known.
+        """
+        node = self.tree
+        for name in path:
+            for child in node['commands'] or ():
+                if child['name'] == name:
+                    node = child
+                    break
+            else:
+                return None
+        return node
+
+    def find_node_for_context(self, ctx):
+        """Like :meth:`find_node` but finds the node for a context."""
+        path = []
+        while ctx.parent is not None:
+            path.append(ctx.info_name)
+            ctx = ctx.parent
+        path.reverse()
+        return self.find_node(path)
+
+    def complete(self, args, incomplete):
+        """Returns the completions for the `incomplete` word after the
+        given arguments (excluding the program name).  This mirrors the
+        regular completion but answers everything from the manifest.
+        Returns `None` if the arguments do not resolve to a known command.
+        """
+        node = self.tree
+        words = list(args)
+        args = list(args)
+        while args:
+            arg = args.pop(0)
+            if arg[:1].isalnum() or len(arg) < 2:
+                if node['commands'] is None:
+                    continue
+                for child in node['commands']:
+                    if child['name'] == arg:
+                        node = child
+                        break
+                else:
+                    return None
+                continue
+            if '=' in arg:
+                continue
+            for param in node['params']:
+                if param['kind'] == 'option' and \
+                   arg in param['opts'] and param['takes_value']:
+                    del args[:param['nargs']]
+                    break
+
+        if words:
+            for param in node['params']:
+                if param['kind'] == 'option' and param['takes_value'] and \
+                   param['choices'] is not None and \
+                   words[-1] in param['opts']:
+                    return sorted(x for x in param['choices']
+                                  if x.startswith(incomplete))
+
+        choices = []
+        if incomplete and not incomplete[:1].isalnum():
+            for param in node['params']:
+                if param['kind'] != 'option':
+                    continue
+                choices.extend(param['opts'])
+                choices.extend(param['secondary_opts'])
+        elif node['commands'] is not None:
+            choices.extend(x['name'] for x in node['commands'])
+        return [x for x in choices if x.startswith(incomplete)]
+
+
+def load_or_build(filename, cli, info_name=None, key=None, sources=()):
+    """Loads the manifest for a command from a file or builds it if the
+    file does not exist or is stale.  A newly built manifest is written to
+    the file.  Failing to write the file is silently ignored.
+
+    .. versionadded:: 4.0
+    """
+    rv = CommandManifest.load(filename, key=key)
+    if rv is not None:
+        return rv
+    rv = CommandManifest.build(cli, info_name=info_name, key=key,
+                               sources=sources)
+    try:
+        rv.save(filename)
+    except (IOError, OSError):
+        pass
+    return rv
@@ -16,6 +16,7 @@
     and might cause us issues.
 """
 import re
+from collections import deque
 from .exceptions import UsageError, NoSuchOption, BadOptionUsage
 from .utils import unpack_args
 
@@ -26,6 +27,16 @@ def _error_args(nargs, opt):
     raise BadOptionUsage(opt, '%s option requires %d arguments' % (opt, nargs))
 
 
+def _fetch_values(option, opt, state):
+    nargs = option.nargs
+    rargs = state.rargs
+    if len(rargs) < nargs:
+        _error_args(nargs, opt)
+    elif nargs == 1:
+        return rargs.popleft()
+    return tuple(rargs.popleft() for _ in range(nargs))
+
+
 def split_opt(opt):
     first = opt[:1]
     if first.isalnum():
@@ -125,7 +136,10 @@ class ParsingState(object):
     def __init__(self, rargs):
         self.opts = {}
         self.largs = []
-        self.rargs = rargs
+        # The remaining arguments are consumed from the left which is why
+        # this is a deque.  A list would make parsing quadratic for very
+        # long argument lists.
+        self.rargs = deque(rargs)
         self.order = []
 
 
@@ -164,6 +178,9 @@ class OptionParser(object):
         self._long_opt = {}
         self._opt_prefixes = set(['-', '--'])
         self._args = []
+        # Lookup structures for error messages that are only built when
+        # needed.  This is shared with bound copies of the parser.
+        self._indexes = {}
 
     def add_option(self, opts, dest, action=None, nargs=1, const=None,
                    obj=None):
@@ -181,6 +198,7 @@ class OptionParser(object):
         option = Option(opts, dest, action=action, nargs=nargs,
                         const=const, obj=obj)
         self._opt_prefixes.update(option.prefixes)
+        self._indexes.clear()
         for opt in option._short_opts:
             self._short_opt[opt] = option
         for opt in option._long_opts:
@@ -196,6 +214,25 @@ class OptionParser(object):
             obj = dest
         self._args.append(Argument(dest=dest, nargs=nargs, obj=obj))
 
+    def bind(self, ctx):
+        """Returns a new parser that shares the option and argument tables
+        of this parser but is bound to another context.  The tables are
+        not modified during parsing which makes it possible to build a
+        parser once and to reuse it for many invocations.  The settings
+        that influence how the tables were built (such as the token
+        normalization function) are taken from the original parser, so
+        this should only be used with compatible contexts.
+
+        .. versionadded:: 4.0
+        """
+        rv = object.__new__(self.__class__)
+        rv.__dict__.update(self.__dict__)
+        rv.ctx = ctx
+        if ctx is not None:
+            rv.allow_interspersed_args = ctx.allow_interspersed_args
+            rv.ignore_unknown_options = ctx.ignore_unknown_options
+        return rv
+
     def parse_args(self, args):
         """Parses positional arguments and returns ``(values, args, order)``
         for the parsed options and arguments as well as the leftover
@@ -213,18 +250,19 @@ class OptionParser(object):
         return state.opts, state.largs, state.order
 
     def _process_args_for_args(self, state):
-        pargs, args = unpack_args(state.largs + state.rargs,
+        state.largs.extend(state.rargs)
+        pargs, args = unpack_args(state.largs,
                                   [x.nargs for x in self._args])
 
         for idx, arg in enumerate(self._args):
             arg.process(pargs[idx], state)
 
         state.largs = args
-        state.rargs = []
+        state.rargs.clear()
 
     def _process_args_for_options(self, state):
         while state.rargs:
-            arg = state.rargs.pop(0)
+            arg = state.rargs.popleft()
             arglen = len(arg)
             # Double dashes always handled explicitly regardless of what
             # prefixes are valid.
@@ -235,7 +273,7 @@ class OptionParser(object):
             elif self.allow_interspersed_args:
                 state.largs.append(arg)
             else:
-                state.rargs.insert(0, arg)
+                state.rargs.appendleft(arg)
                 return
 
         # Say this is the original argument list:
@@ -258,11 +296,29 @@ class OptionParser(object):
         # *empty* -- still a subset of [arg0, ..., arg(i-1)], but
         # not a very interesting subset!
 
+    def _get_long_opt_suggestions(self, opt):
+        from bisect import bisect_left
+        from ._suggest import BKTree, get_suggestions
+        index = self._indexes.get('long_opt')
+        if index is None:
+            names = sorted(self._long_opt)
+            index = self._indexes['long_opt'] = (names, BKTree(names))
+        names, tree = index
+
+        # Options that start with the given one are preferred, otherwise
+        # the options that are closest to it are suggested.
+        rv = []
+        idx = bisect_left(names, opt)
+        while idx < len(names) and names[idx].startswith(opt):
+            rv.append(names[idx])
+            idx += 1
+        return rv or get_suggestions(tree, opt)
+
     def _match_long_opt(self, opt, explicit_value, state):
         if opt not in self._long_opt:
-            possibilities = [word for word in self._long_opt
-                             if word.startswith(opt)]
-            raise NoSuchOption(opt, possibilities=possibilities)
+            # The suggestions are filled in by the caller once it's clear
+            # that this is an error and not a group of short options.
+            raise NoSuchOption(opt)
 
         option = self._long_opt[opt]
         if option.takes_value:
@@ -271,16 +327,9 @@ class OptionParser(object):
             # branch.  This means that the inserted value will be fully
             # consumed.
             if explicit_value is not None:
-                state.rargs.insert(0, explicit_value)
+                state.rargs.appendleft(explicit_value)
 
-            nargs = option.nargs
-            if len(state.rargs) < nargs:
-                _error_args(nargs, opt)
-            elif nargs == 1:
-                value = state.rargs.pop(0)
-            else:
-                value = tuple(state.rargs[:nargs])
-                del state.rargs[:nargs]
+            value = _fetch_values(option, opt, state)
 
         elif explicit_value is not None:
             raise BadOptionUsage(opt, '%s option does not take a value' % opt)
@@ -310,17 +359,10 @@ class OptionParser(object):
                 # Any characters left in arg?  Pretend they're the
                 # next arg, and stop consuming characters of arg.
                 if i < len(arg):
-                    state.rargs.insert(0, arg[i:])
+                    state.rargs.appendleft(arg[i:])
                     stop = True
 
-                nargs = option.nargs
-                if len(state.rargs) < nargs:
-                    _error_args(nargs, opt)
-                elif nargs == 1:
-                    value = state.rargs.pop(0)
-                else:
-                    value = tuple(state.rargs[:nargs])
-                    del state.rargs[:nargs]
+                value = _fetch_values(option, opt, state)
 
             else:
                 value = None
@@ -353,7 +395,7 @@ class OptionParser(object):
         # like "-foo" to be matched as long options.
         try:
             self._match_long_opt(norm_long_opt, explicit_value, state)
-        except NoSuchOption:
+        except NoSuchOption as e:
             # At this point the long option matching failed, and we need
             # to try with short options.  However there is a special rule
             # which says, that if we have a two character options prefix
@@ -363,5 +405,7 @@ class OptionParser(object):
             if arg[:2] not in self._opt_prefixes:
                 return self._match_short_opt(arg, state)
             if not self.ignore_unknown_options:
+                e.possibilities = self._get_long_opt_suggestions(
+                    norm_long_opt)
                 raise
             state.largs.append(arg)
@@ -0,0 +1,328 @@
+"""
+    click.server
+    ~~~~~~~~~~~~
+
+    Implements an optional server mode for Click applications.  A resident
+    process imports the application once and then serves invocations that
+    are forwarded by a small client over a Unix domain socket.  Every
+    request is handled in a forked worker so each invocation gets a fresh
+    copy of the warm interpreter with the standard streams of the client,
+    its environment and its working directory.
+
+    This is only available on POSIX systems with a Python version that
+    supports passing file descriptors over sockets.
+
+    :copyright: (c) 2014 by Armin Ronacher.
+    :license: BSD, see LICENSE for more details.
+"""
+import io
+import os
+import sys
+import json
+import errno
+import socket
+import struct
+import traceback
+
+from .core import _exit_code_from_system_exit
+
+
+_header = struct.Struct('!I')
+_exit_code = struct.Struct('!i')
+
+
+def is_supported():
+    """Returns `True` if the server mode is supported on this platform."""
+    return hasattr(socket, 'AF_UNIX') and hasattr(os, 'fork') and \
+        hasattr(socket.socket, 'sendmsg')
+
+
+def _ensure_supported():
+    if not is_supported():
+        raise RuntimeError('The server mode requires Unix domain sockets, '
+                           'fork() and file descriptor passing which are '
+                           'not available on this platform.')
+
+
+def _recv_exactly(sock, size):
+    buf = b''
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise EOFError('Connection closed unexpectedly')
+        buf += chunk
+    return buf
+
+
+def _send_request(sock, payload, fds):
+    data = json.dumps(payload).encode('utf-8')
+    data = _header.pack(len(data)) + data
+    # The file descriptors travel along with the first chunk of data, the
+    # rest of the payload (environments can be large) follows normally.
+    ancillary = [(socket.SOL_SOCKET, socket.SCM_RIGHTS,
+                  struct.pack('%di' % len(fds), *fds))]
+    sent = sock.sendmsg([data], ancillary)
+    sock.sendall(data[sent:])
+
+
+def _get_peer_uid(sock):
+    # Only Linux tells who is on the other end of a Unix domain socket.
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return None
+    creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED,
+                            struct.calcsize('3i'))
+    return struct.unpack('3i', creds)[1]
+
+
+def _recv_request(sock):
+    fd_size = struct.calcsize('3i')
+    data, ancdata, flags, addr = sock.recvmsg(
+        _header.size, socket.CMSG_SPACE(fd_size))
+    fds = []
+    for level, type, cmsg_data in ancdata:
+        if level == socket.SOL_SOCKET and type == socket.SCM_RIGHTS:
+            cmsg_data = cmsg_data[:len(cmsg_data) - len(cmsg_data) % 4]
+            fds.extend(struct.unpack('%di' % (len(cmsg_data) // 4),
+                                     cmsg_data))
+    if not data:
+        raise EOFError('Connection closed unexpectedly')
+    data += _recv_exactly(sock, _header.size - len(data))
+    size = _header.unpack(data)[0]
+    payload = json.loads(_recv_exactly(sock, size).decode('utf-8'))
+    return payload, fds
+
+
+class CommandServer(object):
+    """A server that keeps a Click command loaded and serves invocations
+    forwarded by :func:`run_client`.  Each request is handled in a forked
+    worker that takes over the standard streams of the client, its
+    environment and working directory and then invokes the command through
+    :meth:`~click.BaseCommand.main` in standalone mode.  The exit code is
+    sent back to the client.
+
+    As clients run commands with the permissions of the server and an
+    environment of their choosing, only the user running the server can
+    connect to the socket.  Where the operating system reports the user on
+    the other end of the connection, connections of other users are
+    refused as well.
+
+    Example::
+
+        from click.server import CommandServer
+        from myapp.cli import cli
+
+        CommandServer(cli, '/tmp/myapp.sock').serve_forever()
+
+    .. versionadded:: 4.0
+
+    :param cli: the command to serve.
+    :param path: the filesystem path of the Unix domain socket.
+    :param prog_name: the program name to use.  By default the name is
+                      taken from the first argument the client sends.
+    :param extra: extra keyword arguments are forwarded to the
+                  :meth:`~click.BaseCommand.main` function of the command.
+    """
+
+    def __init__(self, cli, path, prog_name=None, **extra):
+        _ensure_supported()
+        self.cli = cli
+        self.path = path
+        self.prog_name = prog_name
+        self.extra = extra
+        self.socket = None
+
+    def bind(self):
+        """Binds the server socket.  This is automatically called by
+        :meth:`handle_request` and :meth:`serve_forever` if necessary.
+        """
+        if self.socket is not None:
+            return
+        try:
+            os.unlink(self.path)
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # The socket is created accessible to the owner only so that there
+        # is no window in which others could connect.
+        old_umask = os.umask(0o177)
+        try:
+            sock.bind(self.path)
+            sock.listen(128)
+        except Exception:
+            sock.close()
+            raise
+        finally:
+            os.umask(old_umask)
+        self.socket = sock
+
+    def close(self):
+        """Closes the server socket and removes it from the filesystem."""
+        if self.socket is None:
+            return
+        self.socket.close()
+        self.socket = None
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    def reap_workers(self):
+        """Collects the exit status of finished workers."""
+        while 1:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                if e.errno == errno.ECHILD:
+                    return
+                raise
+            if pid == 0:
+                return
+
+    def handle_request(self):
+        """Accepts a single connection and hands it to a forked worker.
+        Returns the process ID of the worker or `None` if the connection
+        was refused because it came from another user.
+        """
+        self.bind()
+        conn = self.socket.accept()[0]
+        peer_uid = _get_peer_uid(conn)
+        if peer_uid is not None and peer_uid != os.getuid():
+            conn.close()
+            return None
+        # Make sure nothing that is buffered in the server ends up being
+        # written twice or to the streams of the client.
+        for stream in sys.stdout, sys.stderr:
+            try:
+                stream.flush()
+            except Exception:
+                pass
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                self.socket.close()
+                code = self.serve_connection(conn)
+            finally:
+                os._exit(code)
+        conn.close()
+        self.reap_workers()
+        return pid
+
+    def serve_forever(self):
+        """Serves requests until the process is interrupted."""
+        self.bind()
+        try:
+            while 1:
+                self.handle_request()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def serve_connection(self, conn):
+        """Handles a request within the worker.  This sets up the
+        environment of the client, invokes the command and sends back the
+        exit code which is also returned.
+        """
+        # Errors while setting up the worker are reported like errors of
+        # the command.  Once the descriptors of the client are in place,
+        # the traceback ends up on its stderr.
+        try:
+            try:
+                payload, fds = _recv_request(conn)
+                for target, fd in enumerate(fds):
+                    if target < 3 and fd != target:
+                        os.dup2(fd, target)
+                    if fd > 2:
+                        os.close(fd)
+
+                # Fresh stream objects for the descriptors of the client.
+                # The streams of the server might be replaced or buffered,
+                # so they cannot be reused.
+                sys.stdin = io.open(0, 'r', closefd=False)
+                sys.stdout = io.open(1, 'w', closefd=False)
+                sys.stderr = io.open(2, 'w', closefd=False)
+
+                os.chdir(payload['cwd'])
+                os.environ.clear()
+                os.environ.update(payload['env'])
+
+                argv = payload['argv']
+                prog_name = self.prog_name
+                if prog_name is None:
+                    prog_name = os.path.basename(argv and argv[0] or '')
+                sys.argv = argv
+
+                self.cli.main(args=argv[1:], prog_name=prog_name,
+                              **self.extra)
+                code = 0
+            except SystemExit as e:
+                code = _exit_code_from_system_exit(e)
+            except Exception:
+                traceback.print_exc()
+                code = 1
+        finally:
+            for stream in sys.stdout, sys.stderr:
+                try:
+                    stream.flush()
+                except Exception:
+                    pass
+
+        try:
+            conn.sendall(_exit_code.pack(code))
+        finally:
+            conn.close()
+        return code
+
+
+def run_client(path, argv=None, env=None, cwd=None, stdin=None,
+               stdout=None, stderr=None):
+    """Forwards an invocation to a :class:`CommandServer` listening on
+    `path` and returns the exit code of the command.  The file descriptors
+    of the standard streams are passed to the server so the command reads
+    and writes the streams of this process directly.
+
+    A minimal client script looks like this::
+
+        import sys
+        from click.server import run_client
+        sys.exit(run_client('/tmp/myapp.sock'))
+
+    .. versionadded:: 4.0
+
+    :param path: the filesystem path of the server socket.
+    :param argv: the full argument vector including the program name.
+                 Defaults to ``sys.argv``.
+    :param env: the environment for the command.  Defaults to
+                ``os.environ``.
+    :param cwd: the working directory.  Defaults to the current one.
+    :param stdin: file object or descriptor to use as standard input.
+    :param stdout: file object or descriptor to use as standard output.
+    :param stderr: file object or descriptor to use as standard error.
+    """
+    _ensure_supported()
+    fds = []
+    for stream, default in (stdin, 0), (stdout, 1), (stderr, 2):
+        if stream is None:
+            stream = default
+        if not isinstance(stream, int):
+            stream.flush()
+            stream = stream.fileno()
+        fds.append(stream)
+
+    payload = {
+        'argv': list(sys.argv if argv is None else argv),
+        'env': dict(os.environ if env is None else env),
+        'cwd': cwd or os.getcwd(),
+    }
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+        _send_request(sock, payload, fds)
+        return _exit_code.unpack(_recv_exactly(sock, _exit_code.size))[0]
+    finally:
+        sock.close()
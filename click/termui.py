@@ -5,7 +5,7 @@ import struct
 from ._compat import raw_input, text_type, string_types, \
      colorama, isatty, strip_ansi, get_winterm_size, \
      DEFAULT_COLUMNS, WIN
-from .utils import echo
+from .utils import echo, _flush_echo_buffer
 from .exceptions import Abort, UsageError
 from .types import convert_type
 
@@ -18,6 +18,9 @@ _ansi_colors = ('black', 'red', 'green', 'yellow', 'blue', 'magenta',
                 'cyan', 'white', 'reset')
 _ansi_reset_all = '\033[0m'
 
+# The escape codes that start a style by the arguments of :func:`style`.
+_style_prefixes = {}
+
 
 def hidden_prompt_func(prompt):
     import getpass
@@ -67,6 +70,7 @@ def prompt(text, default=None, hide_input=False,
             # Write the prompt separately so that we get nice
             # coloring through colorama on Windows
             echo(text, nl=False, err=err)
+            _flush_echo_buffer()
             return f('')
         except (KeyboardInterrupt, EOFError):
             raise Abort()
@@ -128,6 +132,7 @@ def confirm(text, default=False, abort=False, prompt_suffix=': ',
             # Write the prompt separately so that we get nice
             # coloring through colorama on Windows
             echo(prompt, nl=False, err=err)
+            _flush_echo_buffer()
             value = visible_prompt_func('').lower().strip()
         except (KeyboardInterrupt, EOFError):
             raise Abort()
@@ -208,7 +213,8 @@ def progressbar(iterable=None, length=None, label=None, show_eta=True,
                 show_percent=None, show_pos=False,
                 item_show_func=None, fill_char='#', empty_char='-',
                 bar_template='%(label)s  [%(bar)s]  %(info)s',
-                info_sep='  ', width=36, file=None, color=None):
+                info_sep='  ', width=36, file=None, color=None,
+                refresh_interval=0.1, threaded=False):
     """This function creates an iterable context manager that can be used
     to iterate over something while showing a progress bar.  It will
     either iterate over the `iterable` or `length` items (that are counted
@@ -232,10 +238,37 @@ def progressbar(iterable=None, length=None, label=None, show_eta=True,
             for item in bar:
                 do_something_with(item)
 
+    Instead of iterating, the bar can also be advanced manually by
+    calling ``update(n_steps)`` on it, for instance with the number of
+    bytes processed::
+
+        with progressbar(length=total_size) as bar:
+            for chunk in chunks:
+                process(chunk)
+                bar.update(len(chunk))
+
     .. versionadded:: 2.0
 
+    For work that is spread over threads or processes, a bar created
+    with ``threaded=True`` accepts ``update()`` calls from any thread and
+    is drawn by a background thread.  Child processes can advance it
+    through a counter in shared memory::
+
+        def work(counter, chunk):
+            for item in chunk:
+                process(item)
+                counter.update(1)
+
+        with progressbar(length=len(items), threaded=True) as bar:
+            counter = bar.shared_counter()
+            workers = [multiprocessing.Process(target=work,
+                                               args=(counter, chunk))
+                       for chunk in chunks]
+            ...
+
     .. versionadded:: 4.0
-       Added the `color` parameter.
+       Added the `color`, `refresh_interval` and `threaded` parameters and
+       the `update` and `shared_counter` methods.
 
     :param iterable: an iterable to iterate over.  If not provided the length
                      is required.
@@ -275,6 +308,13 @@ def progressbar(iterable=None, length=None, label=None, show_eta=True,
                   default is autodetection.  This is only needed if ANSI
                   codes are included anywhere in the progress bar output
                   which is not the case by default.
+    :param refresh_interval: the minimum number of seconds between two
+                             redraws of the bar.  Steps in between only
+                             update the position which keeps the overhead
+                             low for many small items.
+    :param threaded: makes the bar safe to update from multiple threads
+                     and draws it from a background thread every
+                     `refresh_interval` seconds.
     """
     from ._termui_impl import ProgressBar
     return ProgressBar(iterable=iterable, length=length, show_eta=show_eta,
@@ -282,7 +322,9 @@ def progressbar(iterable=None, length=None, label=None, show_eta=True,
                        item_show_func=item_show_func, fill_char=fill_char,
                        empty_char=empty_char, bar_template=bar_template,
                        info_sep=info_sep, file=file, label=label,
-                       width=width, color=color)
+                       width=width, color=color,
+                       refresh_interval=refresh_interval,
+                       threaded=threaded)
 
 
 def clear():
@@ -345,6 +387,16 @@ def style(text, fg=None, bg=None, bold=None, dim=None, underline=None,
                   string which means that styles do not carry over.  This
                   can be disabled to compose styles.
     """
+    key = (fg, bg, bold, dim, underline, blink, reverse)
+    prefix = _style_prefixes.get(key)
+    if prefix is None:
+        prefix = _style_prefixes[key] = _build_style_prefix(*key)
+    if reset:
+        return prefix + text + _ansi_reset_all
+    return prefix + text
+
+
+def _build_style_prefix(fg, bg, bold, dim, underline, blink, reverse):
     bits = []
     if fg:
         try:
@@ -366,9 +418,6 @@ def style(text, fg=None, bg=None, bold=None, dim=None, underline=None,
         bits.append('\033[%dm' % (5 if blink else 25))
     if reverse is not None:
         bits.append('\033[%dm' % (7 if reverse else 27))
-    bits.append(text)
-    if reset:
-        bits.append(_ansi_reset_all)
     return ''.join(bits)
 
 
@@ -509,6 +558,7 @@ def pause(info='Press any key to continue ...', err=False):
     try:
         if info:
             echo(info, nl=False, err=err)
+        _flush_echo_buffer()
         try:
             getchar()
         except (KeyboardInterrupt, EOFError):
@@ -2,9 +2,14 @@ import os
 import sys
 import stat
 
-from ._compat import open_stream, text_type, filename_to_ui, get_streerror
+from ._compat import open_stream, open_mapped, text_type, filename_to_ui, \
+     get_streerror
 from .exceptions import BadParameter
-from .utils import safecall, LazyFile
+from .utils import safecall, LazyFile, _bulk_buffer_size
+
+
+# The maximum number of choices that are listed in error messages.
+_max_listed_choices = 10
 
 
 class ParamType(object):
@@ -119,34 +124,125 @@ class Choice(ParamType):
     """The choice type allows a value to checked against a fixed set of
     supported values.  All of these values have to be strings.
 
+    The choices are indexed the first time they are needed so that
+    checking a value does not depend on the number of choices.  Because
+    of that they are stored as a tuple which cannot be modified in place.
+    To change them, assign a new sequence to :attr:`choices`.
+
     See :ref:`choice-opts` for an example.
+
+    .. versionadded:: 4.0
+       Added the `case_sensitive` parameter and :meth:`complete`.
+
+    .. versionchanged:: 4.0
+       :attr:`choices` is a tuple.
+
+    :param choices: the sequence of supported values.
+    :param case_sensitive: set to `False` to make the values match
+                           regardless of the case.
     """
     name = 'choice'
 
-    def __init__(self, choices):
+    def __init__(self, choices, case_sensitive=True):
         self.choices = choices
+        self.case_sensitive = case_sensitive
+
+    def _get_choices(self):
+        return self._choices
+
+    def _set_choices(self, value):
+        self._choices = tuple(value)
+        self._index = None
+        self._normalized_index = None
+        self._prefix_index = None
+
+    choices = property(_get_choices, _set_choices)
+    del _get_choices, _set_choices
+
+    def _fold(self, value):
+        if self.case_sensitive:
+            return value
+        return value.lower()
+
+    def _get_index(self):
+        if self._index is None:
+            index = {}
+            for choice in self._choices:
+                index.setdefault(self._fold(choice), choice)
+            self._index = index
+        return self._index
+
+    def _get_normalized_index(self, func):
+        if self._normalized_index is None or \
+           self._normalized_index[0] is not func:
+            index = {}
+            for choice in self._choices:
+                index.setdefault(self._fold(func(choice)), choice)
+            self._normalized_index = (func, index)
+        return self._normalized_index[1]
+
+    def _get_prefix_index(self):
+        if self._prefix_index is None:
+            pairs = sorted((self._fold(x), x) for x in self._choices)
+            self._prefix_index = ([x[0] for x in pairs],
+                                  [x[1] for x in pairs])
+        return self._prefix_index
+
+    def _format_choices(self, sep):
+        listed = []
+        for choice in self._choices:
+            if len(listed) == _max_listed_choices:
+                return '%s%s... (%d more)' % (
+                    sep.join(listed), sep,
+                    len(self._choices) - _max_listed_choices)
+            listed.append(choice)
+        return sep.join(listed)
 
     def get_metavar(self, param):
         return '[%s]' % '|'.join(self.choices)
 
     def get_missing_message(self, param):
-        return 'Choose from %s.' % ', '.join(self.choices)
+        return 'Choose from %s.' % self._format_choices(', ')
+
+    def complete(self, prefix):
+        """Returns all choices that start with the given prefix in sorted
+        order.
+        """
+        from bisect import bisect_left
+        keys, choices = self._get_prefix_index()
+        prefix = self._fold(prefix)
+        rv = []
+        idx = bisect_left(keys, prefix)
+        while idx < len(keys) and keys[idx].startswith(prefix):
+            rv.append(choices[idx])
+            idx += 1
+        return rv
 
     def convert(self, value, param, ctx):
         # Exact match
-        if value in self.choices:
-            return value
+        rv = self._get_index().get(self._fold(value))
+        if rv is not None:
+            return rv
 
         # Match through normalization
         if ctx is not None and \
            ctx.token_normalize_func is not None:
             value = ctx.token_normalize_func(value)
-            for choice in self.choices:
-                if ctx.token_normalize_func(choice) == value:
-                    return choice
+            rv = self._get_normalized_index(
+                ctx.token_normalize_func).get(self._fold(value))
+            if rv is not None:
+                return rv
 
-        self.fail('invalid choice: %s. (choose from %s)' %
-                  (value, ', '.join(self.choices)), param, ctx)
+        message = 'invalid choice: %s. (choose from %s)' % (
+            value, self._format_choices(', '))
+        # For long lists not all choices are shown so suggest the ones
+        # that are close to the value instead.
+        if len(self._choices) > _max_listed_choices:
+            from difflib import get_close_matches
+            suggestions = get_close_matches(value, self._choices)
+            if suggestions:
+                message += ' Did you mean %s?' % ', '.join(suggestions)
+        self.fail(message, param, ctx)
 
     def __repr__(self):
         return 'Choice(%r)' % list(self.choices)
@@ -270,20 +366,54 @@ class File(ParamType):
     completion the file will be moved over to the original location.  This
     is useful if a file regularly read by other users is modified.
 
+    Files opened in ``'rb'`` mode can be memory mapped by passing
+    ``mmap=True``.  In that case a read-only :class:`mmap.mmap` object is
+    returned instead of a file which supports the usual read methods as
+    well as slicing and :class:`memoryview` without copying the data.  The
+    mapping is never lazy and is closed together with the context.  Stdin,
+    pipes and empty files cannot be mapped and are opened as regular
+    binary streams instead.
+
+    The `compression` parameter enables transparent compression and
+    decompression with ``'gzip'``, ``'bz2'`` or ``'xz'``.  With ``'auto'``
+    the compression is detected from the data when reading and from the
+    file extension when writing.
+
+    The buffer size of the file can be changed with `buffering` which works
+    like for :func:`open`.  With ``bulk=True`` a large buffer is used,
+    this speeds up commands that stream a lot of data.  For ``-`` the
+    standard stream is opened again with that buffer size.
+
     See :ref:`file-args` for more information.
+
+    .. versionadded:: 4.0
+       The `mmap`, `compression`, `buffering` and `bulk` parameters.
     """
     name = 'filename'
     envvar_list_splitter = os.path.pathsep
 
     def __init__(self, mode='r', encoding=None, errors='strict', lazy=None,
-                 atomic=False):
+                 atomic=False, mmap=False, compression=None, buffering=-1,
+                 bulk=False):
+        if mmap and mode != 'rb':
+            raise TypeError('Only files opened in \'rb\' mode can be '
+                            'memory mapped.')
+        if mmap and compression is not None:
+            raise TypeError('Compressed files cannot be memory mapped.')
         self.mode = mode
         self.encoding = encoding
         self.errors = errors
         self.lazy = lazy
         self.atomic = atomic
+        self.mmap = mmap
+        self.compression = compression
+        if bulk and buffering == -1:
+            buffering = _bulk_buffer_size
+        self.buffering = buffering
 
     def resolve_lazy_flag(self, value):
+        if self.mmap:
+            return False
         if self.lazy is not None:
             return self.lazy
         if value == '-':
@@ -301,14 +431,25 @@ class File(ParamType):
 
             if lazy:
                 f = LazyFile(value, self.mode, self.encoding, self.errors,
-                             atomic=self.atomic)
+                             atomic=self.atomic,
+                             compression=self.compression,
+                             buffering=self.buffering)
                 if ctx is not None:
                     ctx.call_on_close(f.close_intelligently)
                 return f
 
+            if self.mmap:
+                m = open_mapped(value)
+                if m is not None:
+                    if ctx is not None:
+                        ctx.call_on_close(safecall(m.close))
+                    return m
+
             f, should_close = open_stream(value, self.mode,
                                           self.encoding, self.errors,
-                                          atomic=self.atomic)
+                                          atomic=self.atomic,
+                                          compression=self.compression,
+                                          buffering=self.buffering)
             # If a context is provided, we automatically close the file
             # at the end of the context execution (or flush out).  If a
             # context does not exist, it's the caller's responsibility to
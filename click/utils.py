@@ -1,3 +1,4 @@
+import io
 import os
 import sys
 from collections import deque
@@ -5,7 +6,8 @@ from collections import deque
 from ._compat import text_type, open_stream, get_streerror, string_types, \
      PY2, binary_streams, text_streams, filename_to_ui, \
      auto_wrap_for_ansi, strip_ansi, should_strip_ansi, \
-     _default_text_stdout, _default_text_stderr, is_bytes, WIN
+     _default_text_stdout, _default_text_stderr, is_bytes, WIN, \
+     open_standard_stream, _AtomicFile
 
 if not PY2:
     from ._compat import _find_binary_writer
@@ -13,6 +15,9 @@ if not PY2:
 
 echo_native_types = string_types + (bytes, bytearray)
 
+# The buffer and chunk size used for bulk I/O.
+_bulk_buffer_size = 1024 * 1024
+
 
 def _posixify(name):
     return '-'.join(name.split()).lower()
@@ -76,6 +81,29 @@ def unpack_args(args, nargs_spec):
     return tuple(rv), list(args)
 
 
+def import_string(import_name):
+    """Imports an object based on a string.  The string can either be
+    in the form ``package.module:object`` or with a dot as the final
+    separator (``package.module.object``).
+
+    .. versionadded:: 4.0
+
+    :param import_name: the dotted name of the object to import.
+    """
+    import_name = str(import_name)
+    if ':' in import_name:
+        module, obj = import_name.split(':', 1)
+    elif '.' in import_name:
+        module, obj = import_name.rsplit('.', 1)
+    else:
+        return __import__(import_name)
+    mod = __import__(module, None, None, [obj])
+    try:
+        return getattr(mod, obj)
+    except AttributeError:
+        raise ImportError('Module %r has no attribute %r' % (module, obj))
+
+
 def safecall(func):
     """Wraps a function so that it swallows exceptions."""
     def wrapper(*args, **kwargs):
@@ -128,16 +156,19 @@ class LazyFile(object):
     """
 
     def __init__(self, filename, mode='r', encoding=None, errors='strict',
-                 atomic=False):
+                 atomic=False, compression=None, buffering=-1):
         self.name = filename
         self.mode = mode
         self.encoding = encoding
         self.errors = errors
         self.atomic = atomic
+        self.compression = compression
+        self.buffering = buffering
 
         if filename == '-':
-            self._f, self.should_close = open_stream(filename, mode,
-                                                     encoding, errors)
+            self._f, self.should_close = open_stream(
+                filename, mode, encoding, errors, compression=compression,
+                buffering=buffering)
         else:
             if 'r' in mode:
                 # Open and close the file in case we're opening it for
@@ -166,7 +197,9 @@ class LazyFile(object):
             rv, self.should_close = open_stream(self.name, self.mode,
                                                 self.encoding,
                                                 self.errors,
-                                                atomic=self.atomic)
+                                                atomic=self.atomic,
+                                                compression=self.compression,
+                                                buffering=self.buffering)
         except (IOError, OSError) as e:
             from .exceptions import FileError
             raise FileError(self.name, hint=get_streerror(e))
@@ -210,6 +243,162 @@ class KeepOpenFile(object):
         return repr(self._file)
 
 
+# The echo buffer that is currently active, see :func:`buffered_echo`.
+_echo_buffer = None
+
+
+class _BufferedStream(object):
+    __slots__ = ('file', 'binary_file', 'strip', 'pending', 'binary', 'size')
+
+    def __init__(self, file):
+        self.file = file
+        self.binary_file = None
+        if not PY2:
+            self.binary_file = _find_binary_writer(file)
+        self.strip = should_strip_ansi(file)
+        self.pending = []
+        self.binary = False
+        self.size = 0
+
+    def flush(self):
+        if not self.pending:
+            self.file.flush()
+            return
+        if self.binary:
+            self.file.flush()
+            self.binary_file.write(b''.join(self.pending))
+            self.binary_file.flush()
+        else:
+            if PY2:
+                # Text and byte strings can be mixed on Python 2 which
+                # cannot always be joined.
+                for piece in self.pending:
+                    self.file.write(piece)
+            else:
+                self.file.write(''.join(self.pending))
+            self.file.flush()
+        del self.pending[:]
+        self.size = 0
+
+
+class _EchoBuffer(object):
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.streams = {}
+        self.thread = None
+        self.get_ident = None
+        self.previous = None
+
+    def write(self, file, message, nl, color):
+        # Other threads write directly as their output would interleave
+        # with the buffered one in unexpected ways otherwise.
+        if self.get_ident() != self.thread:
+            return False
+        stream = self.streams.get(id(file))
+        if stream is None:
+            stream = self.streams[id(file)] = _BufferedStream(file)
+
+        binary = False
+        if message and not PY2 and is_bytes(message):
+            if stream.binary_file is None:
+                stream.flush()
+                return False
+            binary = True
+            if nl:
+                message += b'\n'
+        else:
+            if message and not is_bytes(message):
+                if color is None:
+                    strip = stream.strip
+                else:
+                    strip = not color
+                if strip:
+                    message = strip_ansi(message)
+                elif WIN:
+                    # Colorama needs to see the writes as they happen.
+                    if auto_wrap_for_ansi is not None:
+                        stream.flush()
+                        return False
+                    elif not color:
+                        message = strip_ansi(message)
+            if nl:
+                message = (message or '') + '\n'
+        if not message:
+            return True
+
+        if binary != stream.binary:
+            stream.flush()
+            stream.binary = binary
+        stream.pending.append(message)
+        stream.size += len(message)
+        if stream.size >= self.threshold:
+            stream.flush()
+        return True
+
+    def flush(self):
+        """Writes out all buffered output."""
+        for stream in self.streams.values():
+            stream.flush()
+
+    def __enter__(self):
+        global _echo_buffer
+        try:
+            from threading import get_ident
+        except ImportError:
+            from thread import get_ident
+        self.get_ident = get_ident
+        self.thread = get_ident()
+        if _echo_buffer is not None:
+            if _echo_buffer.thread != self.thread:
+                raise RuntimeError('Echo output is already buffered by '
+                                   'another thread.')
+            _echo_buffer.flush()
+        self.previous = _echo_buffer
+        _echo_buffer = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        global _echo_buffer
+        _echo_buffer = self.previous
+        self.previous = None
+        self.flush()
+        self.streams.clear()
+
+
+def buffered_echo(threshold=65536):
+    """Returns a context manager that buffers the output of :func:`echo`
+    and :func:`secho` to stdout and stderr in the current thread.  Instead
+    of flushing the stream after every call, the output is collected and
+    written once `threshold` characters were buffered for a stream, when
+    the buffer is flushed explicitly and when the block ends.  Output to
+    other files that are passed explicitly is written right away.
+    Whether a stream is a terminal (and ANSI codes need to be stripped) is
+    only checked once.  This makes commands that write a lot of small
+    messages a lot faster::
+
+        with click.buffered_echo() as buf:
+            for item in items:
+                click.echo(item)
+
+    Output that is written to the streams by other means (for instance
+    ``print``) can end up out of order.  Call ``buf.flush()`` before.
+    Prompts and progress bars flush the buffer automatically.
+
+    .. versionadded:: 4.0
+
+    :param threshold: the number of characters (or bytes) that are buffered
+                      per stream before they are written.
+    """
+    return _EchoBuffer(threshold)
+
+
+def _flush_echo_buffer():
+    buf = _echo_buffer
+    if buf is not None and buf.get_ident() == buf.thread:
+        buf.flush()
+
+
 def echo(message=None, file=None, nl=True, err=False, color=None):
     """Prints a message plus a newline to the given file or stdout.  On
     first sight, this looks like the print function, but it has improved
@@ -250,7 +439,11 @@ def echo(message=None, file=None, nl=True, err=False, color=None):
     :param color: controls if the terminal supports ANSI colors or not.  The
                   default is autodetection.
     """
+    # Only the standard streams are buffered.  Other files can be closed
+    # before the buffer is flushed which would lose their output.
+    buf = None
     if file is None:
+        buf = _echo_buffer
         if err:
             file = _default_text_stderr()
         else:
@@ -260,6 +453,9 @@ def echo(message=None, file=None, nl=True, err=False, color=None):
     if message is not None and not isinstance(message, echo_native_types):
         message = text_type(message)
 
+    if buf is not None and buf.write(file, message, nl, color):
+        return
+
     # If there is a message, and we're in Python 3, and the value looks
     # like bytes, we manually need to find the binary stream and write the
     # message in there.  This is done separately so that most stream
@@ -296,41 +492,211 @@ def echo(message=None, file=None, nl=True, err=False, color=None):
     file.flush()
 
 
-def get_binary_stream(name):
+def get_binary_stream(name, buffering=-1):
     """Returns a system stream for byte processing.  This essentially
     returns the stream from the sys module with the given name but it
     solves some compatibility issues between different Python versions.
     Primarily this function is necessary for getting binary streams on
     Python 3.
 
+    .. versionadded:: 4.0
+       The `buffering` parameter.
+
     :param name: the name of the stream to open.  Valid names are ``'stdin'``,
                  ``'stdout'`` and ``'stderr'``
+    :param buffering: if given, the stream is opened again with this buffer
+                      size.  Closing that stream does not close the
+                      standard stream but it has to be flushed before
+                      anything else is written to it.
     """
-    opener = binary_streams.get(name)
-    if opener is None:
+    if name not in binary_streams:
         raise TypeError('Unknown standard stream %r' % name)
-    return opener()
+    return open_standard_stream(name, buffering=buffering)
 
 
-def get_text_stream(name, encoding=None, errors='strict'):
+def get_text_stream(name, encoding=None, errors='strict', buffering=-1):
     """Returns a system stream for text processing.  This usually returns
     a wrapped stream around a binary stream returned from
     :func:`get_binary_stream` but it also can take shortcuts on Python 3
     for already correctly configured streams.
 
+    .. versionadded:: 4.0
+       The `buffering` parameter.
+
     :param name: the name of the stream to open.  Valid names are ``'stdin'``,
                  ``'stdout'`` and ``'stderr'``
     :param encoding: overrides the detected default encoding.
     :param errors: overrides the default error mode.
+    :param buffering: if given, the stream is opened again with this buffer
+                      size and is no longer line buffered.
     """
-    opener = text_streams.get(name)
-    if opener is None:
+    if name not in text_streams:
         raise TypeError('Unknown standard stream %r' % name)
-    return opener(encoding, errors)
+    return open_standard_stream(name, True, encoding, errors, buffering)
+
+
+def iter_chunks(f, chunk_size=None):
+    """Iterates over the data of a binary file in chunks of up to
+    `chunk_size` bytes which defaults to one megabyte.  On pipes and
+    sockets the chunks are returned as soon as data is available instead
+    of waiting for the chunk to fill up.  This works with every file
+    that has a `read` method, including the memory mapped files of the
+    :class:`File` type::
+
+        for chunk in click.iter_chunks(input):
+            output.write(chunk)
+
+    .. versionadded:: 4.0
+    """
+    if chunk_size is None:
+        chunk_size = _bulk_buffer_size
+    read = getattr(f, 'read1', None) or f.read
+    while 1:
+        chunk = read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+def _unwrap_file(f):
+    while 1:
+        if isinstance(f, LazyFile):
+            f = f.open()
+        elif isinstance(f, KeepOpenFile):
+            f = f._file
+        elif isinstance(f, _AtomicFile):
+            f = f._f
+        else:
+            return f
+
+
+def _get_fileno(f):
+    # Only plain binary files are copied through their file descriptors.
+    # Other objects that have one (like text or compressed streams) do
+    # not transfer their data unchanged.
+    if not isinstance(f, (io.FileIO, io.BufferedReader, io.BufferedWriter,
+                          io.BufferedRandom)):
+        return None
+    try:
+        return f.fileno()
+    except (AttributeError, IOError, OSError, ValueError):
+        return None
+
+
+def copy_stream(src, dst, length=None, progress=None, chunk_size=None):
+    """Copies the data from the binary file `src` to the binary file `dst`
+    and returns the number of copied bytes.  Data already read from `src`
+    (for instance to check a header) is not copied again.
+
+    If both files are backed by file descriptors, the data is copied by
+    the kernel with :func:`os.sendfile` or :func:`os.splice` where
+    available without passing through Python.  Otherwise it's copied in
+    chunks of `chunk_size` bytes which defaults to one megabyte::
+
+        @click.command()
+        @click.argument('src', type=click.File('rb'))
+        @click.argument('dst', type=click.File('wb'))
+        def cp(src, dst):
+            with click.progressbar(length=os.fstat(src.fileno()).st_size,
+                                   label='Copying') as bar:
+                click.copy_stream(src, dst, progress=bar)
+
+    .. versionadded:: 4.0
+
+    :param src: the file to read from.
+    :param dst: the file to write to.
+    :param length: the maximum number of bytes to copy.  The default is to
+                   copy until the end of `src`.
+    :param progress: a progress bar returned by :func:`progressbar` (or any
+                     object with an ``update(n)`` method) which is advanced
+                     by the number of copied bytes.
+    :param chunk_size: the number of bytes to copy at once.
+    """
+    if chunk_size is None:
+        chunk_size = _bulk_buffer_size
+    src = _unwrap_file(src)
+    dst = _unwrap_file(dst)
+    copied = 0
+
+    transfer = None
+    src_fd = _get_fileno(src)
+    dst_fd = _get_fileno(dst)
+    if src_fd is not None and dst_fd is not None:
+        dst.flush()
+        transfer, copied = _get_fd_transfer(src, src_fd, dst_fd, length,
+                                            dst, progress)
+    transferred = 0
+
+    read = getattr(src, 'read1', None) or src.read
+    while length is None or copied < length:
+        count = chunk_size
+        if length is not None:
+            count = min(count, length - copied)
+        if transfer is not None:
+            try:
+                n = transfer(transferred, count)
+            except OSError:
+                # The kernel does not support copying between these files
+                # which can only be noticed when trying.
+                if transferred:
+                    raise
+                transfer = None
+                continue
+            transferred += n
+        else:
+            chunk = read(count)
+            if chunk:
+                dst.write(chunk)
+            n = len(chunk)
+        if not n:
+            break
+        copied += n
+        if progress is not None:
+            progress.update(n)
+
+    if transferred:
+        # Both files still have their old positions in Python.
+        if src.seekable():
+            src.seek(src.tell() + transferred)
+        if dst.seekable():
+            dst.seek(os.lseek(dst_fd, 0, os.SEEK_CUR))
+    return copied
+
+
+def _get_fd_transfer(src, src_fd, dst_fd, length, dst, progress):
+    # Returns a function that copies up to a given number of bytes between
+    # the file descriptors and the number of bytes that had to be copied
+    # beforehand.
+    if src.seekable() and hasattr(os, 'sendfile'):
+        # The offset is passed explicitly as the position of the
+        # descriptor is ahead of `src` if it buffered data.
+        offset = src.tell()
+        return (lambda transferred, count:
+                os.sendfile(dst_fd, src_fd, offset + transferred, count)), 0
+
+    if not hasattr(os, 'splice'):
+        return None, 0
+
+    # Splicing reads from the current position of the descriptor which is
+    # behind the data that is already in the buffer of `src`.  That data
+    # is written out first.
+    copied = 0
+    if isinstance(src, io.BufferedReader):
+        buffered = src.peek(1)
+        if length is not None:
+            buffered = buffered[:length]
+        if buffered:
+            dst.write(src.read(len(buffered)))
+            dst.flush()
+            copied = len(buffered)
+            if progress is not None:
+                progress.update(copied)
+    return (lambda transferred, count: os.splice(src_fd, dst_fd, count)), \
+        copied
 
 
 def open_file(filename, mode='r', encoding=None, errors='strict',
-              lazy=False, atomic=False):
+              lazy=False, atomic=False, compression=None, buffering=-1):
     """This is similar to how the :class:`File` works but for manual
     usage.  Files are opened non lazy by default.  This can open regular
     files as well as stdin/stdout if ``'-'`` is passed.
@@ -345,6 +711,9 @@ def open_file(filename, mode='r', encoding=None, errors='strict',
 
     .. versionadded:: 3.0
 
+    .. versionadded:: 4.0
+       The `compression` and `buffering` parameters.
+
     :param filename: the name of the file to open (or ``'-'`` for stdin/stdout).
     :param mode: the mode in which to open the file.
     :param encoding: the encoding to use.
@@ -352,11 +721,22 @@ def open_file(filename, mode='r', encoding=None, errors='strict',
     :param lazy: can be flipped to true to open the file lazily.
     :param atomic: in atomic mode writes go into a temporary file and it's
                    moved on close.
+    :param compression: the compression of the file.  This can be
+                        ``'gzip'``, ``'bz2'``, ``'xz'`` or ``'auto'`` to
+                        detect it from the file contents when reading and
+                        from the file extension when writing.  The data is
+                        compressed and decompressed while it streams
+                        through the file.
+    :param buffering: the buffer size like for :func:`open`.  For ``'-'``
+                      the standard stream is opened again with this buffer
+                      size.
     """
     if lazy:
-        return LazyFile(filename, mode, encoding, errors, atomic=atomic)
+        return LazyFile(filename, mode, encoding, errors, atomic=atomic,
+                        compression=compression, buffering=buffering)
     f, should_close = open_stream(filename, mode, encoding, errors,
-                                  atomic=atomic)
+                                  atomic=atomic, compression=compression,
+                                  buffering=buffering)
     if not should_close:
         f = KeepOpenFile(f)
     return f
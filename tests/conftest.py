@@ -1,8 +1,16 @@
+import sys
+
 from click.testing import CliRunner
 
 import pytest
 
 
+# The coroutine tests use syntax that older Python versions do not support.
+collect_ignore = []
+if sys.version_info < (3, 5):
+    collect_ignore.append('test_async.py')
+
+
 @pytest.fixture(scope='function')
 def runner(request):
     return CliRunner()
@@ -18,6 +18,26 @@ def test_nargs_star(runner):
     ]
 
 
+def test_nargs_star_large_argv():
+    # Parsing is linear in the number of arguments.  With the old
+    # quadratic implementation this took minutes.
+    parser = click.OptionParser()
+    parser.add_option(['-v'], dest='verbose', action='count')
+    parser.add_option(['-o'], dest='output')
+    parser.add_argument('src', nargs=-1)
+    parser.add_argument('dst')
+
+    args = ['file%d' % x for x in range(1000000)]
+    args[::1000] = ['-v'] * len(args[::1000])
+    args[1:3] = ['-o', 'out']
+    opts, largs, order = parser.parse_args(args)
+    assert opts['verbose'] == 1000
+    assert opts['output'] == 'out'
+    assert len(opts['src']) == len(args) - 1002 - 1
+    assert opts['dst'] == 'file999999'
+    assert largs == []
+
+
 def test_nargs_tup(runner):
     @click.command()
     @click.argument('name', nargs=1)
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import threading
+
+import click
+
+
+def test_coroutine_callbacks(runner):
+    loops = []
+
+    async def check_value(ctx, param, value):
+        loops.append(asyncio.get_event_loop())
+        return value.upper()
+
+    @click.group(chain=True)
+    @click.option('--name', callback=check_value)
+    async def cli(name):
+        loops.append(asyncio.get_event_loop())
+        click.echo('Hello %s!' % name)
+
+    @cli.resultcallback()
+    async def process_results(results, name):
+        loops.append(asyncio.get_event_loop())
+        click.echo(' '.join(results))
+
+    @cli.command()
+    async def first():
+        await asyncio.sleep(0)
+        loops.append(asyncio.get_event_loop())
+        return 'first'
+
+    @cli.command()
+    def second():
+        return 'second'
+
+    result = runner.invoke(cli, ['--name', 'world', 'first', 'second'])
+    assert not result.exception
+    assert result.output == 'Hello WORLD!\nfirst second\n'
+    assert len(loops) == 4
+    assert len(set(loops)) == 1
+    assert loops[0].is_closed()
+
+
+def test_nested_invoke(runner):
+    @click.command()
+    @click.argument('value', type=click.INT)
+    async def double(value):
+        return value * 2
+
+    @click.command()
+    @click.pass_context
+    async def cli(ctx):
+        click.echo(await ctx.invoke(double, value=21))
+
+    result = runner.invoke(cli, [])
+    assert not result.exception
+    assert result.output == '42\n'
+
+
+def test_parallel_async_chain(runner):
+    started = []
+
+    @click.group(chain=True, chain_workers=2)
+    def cli():
+        pass
+
+    @cli.resultcallback()
+    def process_results(results):
+        click.echo(' '.join(results))
+
+    @cli.command()
+    @click.argument('name')
+    async def step(name):
+        started.append(name)
+        # Both steps need to be running at the same time.
+        while len(started) < 2:
+            await asyncio.sleep(0.001)
+        return name
+
+    result = runner.invoke(cli, ['step', 'a', 'step', 'b'])
+    assert not result.exception
+    assert result.output == 'a b\n'
+
+
+def test_parallel_mixed_chain(runner):
+    @click.group(chain=True, chain_workers=3)
+    def cli():
+        pass
+
+    @cli.resultcallback()
+    def process_results(results):
+        click.echo(' '.join(results))
+
+    @cli.command()
+    @click.argument('delay', type=float)
+    async def slow(delay):
+        await asyncio.sleep(delay)
+        return str(delay)
+
+    @cli.command()
+    def sync():
+        return 'sync'
+
+    @cli.command()
+    def legacy():
+        # Plain functions that return coroutines share the loop as well.
+        return slow.callback(0.01)
+
+    results = []
+
+    def invoke():
+        for x in range(5):
+            results.append(runner.invoke(cli, [
+                'slow', '0.05', 'slow', '0.2', 'sync', 'legacy']))
+
+    # The first coroutine to finish used to stop the loop the others
+    # were waiting on which never returned.
+    thread = threading.Thread(target=invoke)
+    thread.daemon = True
+    thread.start()
+    thread.join(10)
+    assert not thread.is_alive()
+    for result in results:
+        assert not result.exception
+        assert result.output == '0.05 0.2 sync 0.01\n'
+
+
+def test_main_async():
+    @click.command()
+    @click.argument('name')
+    async def cli(name):
+        await asyncio.sleep(0)
+        return asyncio.get_event_loop(), name
+
+    async def caller():
+        rv = await cli.main_async(['world'], standalone_mode=False)
+        return asyncio.get_event_loop(), rv
+
+    loop = asyncio.new_event_loop()
+    try:
+        caller_loop, (cmd_loop, name) = loop.run_until_complete(caller())
+    finally:
+        loop.close()
+    assert name == 'world'
+    assert cmd_loop is caller_loop is loop
@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
 import os
+import mmap
+import threading
 import uuid
 import click
+import pytest
 
 
 def test_basic_functionality(runner):
@@ -242,6 +245,58 @@ def test_file_lazy_mode(runner):
             in result_in.output
 
 
+def test_file_mmap(runner):
+    @click.command()
+    @click.argument('f', type=click.File('rb', mmap=True))
+    def cli(f):
+        if isinstance(f, mmap.mmap):
+            click.echo(repr(bytes(f[:5])))
+        click.echo(repr(f.read()))
+
+    with runner.isolated_filesystem():
+        with open('data.bin', 'wb') as f:
+            f.write(b'Hello World!')
+        with open('empty.bin', 'wb') as f:
+            pass
+
+        result = runner.invoke(cli, ['data.bin'])
+        assert not result.exception
+        assert result.output.splitlines() == [
+            repr(b'Hello'), repr(b'Hello World!')]
+
+        result = runner.invoke(cli, ['empty.bin'])
+        assert not result.exception
+        assert result.output.splitlines() == [repr(b'')]
+
+        result = runner.invoke(cli, ['-'], input='Hello')
+        assert not result.exception
+        assert result.output.splitlines() == [repr(b'Hello')]
+
+        result = runner.invoke(cli, ['missing.bin'])
+        assert result.exit_code == 2
+        assert 'Could not open file: missing.bin' in result.output
+
+        if hasattr(os, 'mkfifo'):
+            # Fifos fall back to a stream that is only opened once as
+            # each open waits for a writer.
+            os.mkfifo('fifo')
+            results = []
+
+            def invoke():
+                results.append(runner.invoke(cli, ['fifo']))
+            thread = threading.Thread(target=invoke)
+            thread.daemon = True
+            thread.start()
+            with open('fifo', 'wb') as f:
+                f.write(b'Hello')
+            thread.join(10)
+            assert not thread.is_alive()
+            assert not results[0].exception
+            assert results[0].output.splitlines() == [repr(b'Hello')]
+
+    pytest.raises(TypeError, click.File, 'r', mmap=True)
+
+
 def test_path_option(runner):
     @click.command()
     @click.option('-O', type=click.Path(file_okay=False, exists=True,
@@ -310,6 +365,58 @@ def test_choice_option(runner):
     assert '--method [foo|bar|baz]' in result.output
 
 
+def test_choice_index(runner):
+    regions = ['region-%04d' % x for x in range(5000)]
+
+    @click.command()
+    @click.option('--region', type=click.Choice(regions), multiple=True)
+    @click.option('--mode', type=click.Choice(['Fast', 'Slow'],
+                                              case_sensitive=False))
+    def cli(region, mode):
+        click.echo('%s %s' % (','.join(region), mode))
+
+    result = runner.invoke(cli, ['--region', 'region-0042',
+                                 '--region', 'region-4999',
+                                 '--mode', 'fAST'])
+    assert not result.exception
+    assert result.output == 'region-0042,region-4999 Fast\n'
+
+    result = runner.invoke(cli, ['--region', 'region-00042'])
+    assert result.exit_code == 2
+    assert 'choose from region-0000, region-0001' in result.output
+    assert '... (4990 more)' in result.output
+    assert 'Did you mean region-0042' in result.output
+    assert 'region-0011' not in result.output
+
+    choice = cli.params[0].type
+    assert choice.complete('region-499') == [
+        'region-4990', 'region-4991', 'region-4992', 'region-4993',
+        'region-4994', 'region-4995', 'region-4996', 'region-4997',
+        'region-4998', 'region-4999',
+    ]
+    assert choice.complete('x') == []
+    assert cli.params[1].type.complete('s') == ['Slow']
+
+    # The choices cannot be changed behind the back of the index.
+    assert choice.choices == tuple(regions)
+    assert isinstance(choice.choices, tuple)
+    choice.choices = choice.choices + ('region-x',)
+    result = runner.invoke(cli, ['--region', 'region-x'])
+    assert not result.exception
+    assert result.output == 'region-x None\n'
+
+    result = runner.invoke(cli, [], env={
+        'COMP_WORDS': 'cli --region region-123',
+        'COMP_CWORD': '2',
+        '_CLI_COMPLETE': 'complete',
+    })
+    assert result.output.split() == ['region-1230', 'region-1231',
+                                     'region-1232', 'region-1233',
+                                     'region-1234', 'region-1235',
+                                     'region-1236', 'region-1237',
+                                     'region-1238', 'region-1239']
+
+
 def test_int_range_option(runner):
     @click.command()
     @click.option('--x', type=click.IntRange(0, 5))
@@ -397,3 +504,24 @@ def test_evaluation_order(runner):
         'normal1',
         'missing',
     ]
+
+
+def test_evaluation_order_multiple(runner):
+    called = []
+
+    def memo(ctx, param, value):
+        called.append(param.name)
+        return value
+
+    @click.command()
+    @click.option('--tag', multiple=True, callback=memo)
+    @click.option('--name', callback=memo)
+    @click.option('--other', callback=memo)
+    def cli(tag, name, other):
+        click.echo(len(tag))
+
+    args = ['--name', 'x'] + ['--tag', 'foo'] * 5000
+    result = runner.invoke(cli, args)
+    assert not result.exception
+    assert result.output == '5000\n'
+    assert called == ['name', 'tag', 'other']
@@ -183,3 +183,146 @@ def test_pipeline(runner):
         'FOO',
         'BAR',
     ]
+
+
+def test_stream_chain(runner):
+    @click.group(chain=True, stream_chain=True)
+    def cli():
+        pass
+
+    @cli.resultcallback()
+    def process_results(results):
+        for result in results:
+            click.echo('result %s' % result)
+
+    @cli.command('step')
+    @click.argument('value', type=click.INT)
+    def step(value):
+        click.echo('step %d' % value)
+        return value * 2
+
+    result = runner.invoke(cli, ['step', '1', 'step', '2'])
+    assert not result.exception
+    assert result.output.splitlines() == [
+        'step 1',
+        'result 2',
+        'step 2',
+        'result 4',
+    ]
+
+    result = runner.invoke(cli, ['step', '1', 'step', 'x'])
+    assert result.exit_code == 2
+    assert result.output.splitlines()[:2] == ['step 1', 'result 2']
+    assert 'Invalid value for "value"' in result.output
+
+
+def test_stream_chain_unconsumed(runner):
+    @click.group(chain=True, stream_chain=True)
+    def cli():
+        pass
+
+    @cli.resultcallback()
+    def process_results(results):
+        click.echo('first %s' % next(results))
+        return 'done'
+
+    @cli.command('step')
+    @click.argument('value')
+    def step(value):
+        click.echo('step %s' % value)
+        return value
+
+    result = runner.invoke(cli, ['step', 'a', 'step', 'b', 'step', 'c'])
+    assert not result.exception
+    assert result.output.splitlines() == [
+        'step a',
+        'first a',
+        'step b',
+        'step c',
+    ]
+
+
+def test_parallel_chain(runner):
+    import threading
+    started = threading.Event()
+
+    @click.group(chain=True, chain_workers=2)
+    def cli():
+        pass
+
+    @cli.resultcallback()
+    def process_results(results):
+        click.echo(' '.join(results))
+
+    @cli.command('wait')
+    def wait():
+        # Only finishes if the next subcommand runs at the same time.
+        assert started.wait(5)
+        return 'waited'
+
+    @cli.command('start')
+    def start():
+        started.set()
+        return 'started'
+
+    result = runner.invoke(cli, ['wait', 'start'])
+    assert not result.exception
+    assert result.output == 'waited started\n'
+
+
+def test_parallel_chain_failure(runner):
+    closed = []
+
+    def register_close(ctx, param, value):
+        ctx.call_on_close(lambda: closed.append(value))
+        return value
+
+    @click.group(chain=True, chain_workers=1)
+    def cli():
+        pass
+
+    @cli.command('step')
+    @click.option('--name', callback=register_close)
+    @click.option('--fail', is_flag=True)
+    @click.pass_context
+    def step(ctx, name, fail):
+        if fail:
+            ctx.fail('Step %s failed' % name)
+        click.echo('step %s' % name)
+
+    result = runner.invoke(cli, ['step', '--name', 'a', '--fail',
+                                 'step', '--name', 'b',
+                                 'step', '--name', 'c'])
+    assert result.exit_code == 2
+    assert 'Error: Step a failed' in result.output
+    assert sorted(closed) == ['a', 'b', 'c']
+
+
+def test_parallel_chain_failure_cancels(runner):
+    import time
+    recorded = []
+
+    @click.group(chain=True, chain_workers=2)
+    def cli():
+        pass
+
+    @cli.command('slow')
+    def slow():
+        time.sleep(1)
+
+    @cli.command('fail')
+    @click.pass_context
+    def fail(ctx):
+        ctx.fail('Step failed')
+
+    @cli.command('record')
+    def record():
+        recorded.append(1)
+        time.sleep(0.1)
+
+    # The failure is noticed while the first subcommand still runs and
+    # stops the queued ones from starting.
+    result = runner.invoke(cli, ['slow', 'fail'] + ['record'] * 5)
+    assert result.exit_code == 2
+    assert 'Error: Step failed' in result.output
+    assert len(recorded) <= 1
@@ -270,3 +270,319 @@ def test_unprocessed_options(runner):
         'Verbosity: 4',
         'Args: -foo|-x|--muhaha|x|y|-x',
     ]
+
+
+def test_parser_is_cached(runner):
+    @click.command()
+    @click.option('--foo')
+    def cli(foo):
+        click.echo('Foo: %s' % foo)
+
+    ctx = click.Context(cli)
+    parser = cli.make_parser(ctx)
+    other = cli.make_parser(click.Context(cli))
+    assert other is not parser
+    assert other._long_opt is parser._long_opt
+    assert cli.get_help_option(ctx) is cli.get_help_option(ctx)
+
+    for x in range(3):
+        result = runner.invoke(cli, ['--foo', str(x)])
+        assert not result.exception
+        assert result.output == 'Foo: %d\n' % x
+
+    cli.params.append(click.Option(['--bar']))
+    assert '--bar' in cli.make_parser(ctx)._long_opt
+
+    ctx = click.Context(cli, token_normalize_func=lambda x: x.lower())
+    assert cli.make_parser(ctx)._long_opt is not other._long_opt
+    assert cli.make_parser(ctx).ctx is ctx
+
+
+def test_parser_cache_context_params(runner):
+    force = click.Option(['--force'], is_flag=True)
+
+    class AdminCommand(click.Command):
+        def get_params(self, ctx):
+            rv = click.Command.get_params(self, ctx)
+            if ctx.obj == 'admin':
+                rv = rv + [force]
+            return rv
+
+        def get_help_option_names(self, ctx):
+            if ctx.obj == 'admin':
+                return set(['--admin-help'])
+            return set(['--help'])
+
+    @click.command(cls=AdminCommand)
+    @click.pass_context
+    def cli(ctx, **kwargs):
+        click.echo('%s %s' % (ctx.obj, sorted(kwargs)))
+
+    for x in range(2):
+        result = runner.invoke(cli, [], obj='user')
+        assert result.output == "user []\n"
+        result = runner.invoke(cli, ['--force'], obj='admin')
+        assert not result.exception
+        assert result.output == "admin ['force']\n"
+        result = runner.invoke(cli, ['--admin-help'], obj='admin')
+        assert 'Show this message and exit.' in result.output
+        result = runner.invoke(cli, ['--help'], obj='user')
+        assert 'Show this message and exit.' in result.output
+
+
+def test_lazy_commands(runner, tmpdir, monkeypatch):
+    tmpdir.join('lazy_cmd_sync.py').write('''
+import click
+
+@click.command()
+def cli():
+    """Synchronizes things."""
+    click.echo('Syncing')
+''')
+    tmpdir.join('lazy_cmd_push.py').write('''
+import click
+
+@click.command()
+def cli():
+    """Pushes things."""
+    click.echo('Pushing')
+''')
+    monkeypatch.syspath_prepend(str(tmpdir))
+    import sys
+
+    @click.group()
+    def cli():
+        pass
+
+    cli.add_lazy_command('lazy_cmd_sync:cli', 'sync', 'Synchronizes.')
+    cli.add_lazy_command('lazy_cmd_push.cli', 'push')
+
+    @cli.command()
+    def version():
+        click.echo('1.0')
+
+    result = runner.invoke(cli, ['version'])
+    assert not result.exception
+    assert result.output == '1.0\n'
+    assert 'lazy_cmd_sync' not in sys.modules
+    assert 'lazy_cmd_push' not in sys.modules
+
+    result = runner.invoke(cli, ['--help'])
+    assert not result.exception
+    assert 'sync     Synchronizes.' in result.output
+    assert 'push     Pushes things.' in result.output
+    assert 'lazy_cmd_sync' not in sys.modules
+    assert 'lazy_cmd_push' in sys.modules
+
+    result = runner.invoke(cli, ['sync'])
+    assert not result.exception
+    assert result.output == 'Syncing\n'
+    assert cli.list_commands(None) == ['push', 'sync', 'version']
+    assert cli.lazy_commands == {}
+
+    cli.add_lazy_command('lazy_cmd_missing:cli', 'missing', 'Missing.')
+    result = runner.invoke(cli, ['missing'])
+    assert isinstance(result.exception, ImportError)
+
+
+def test_help_cache(runner):
+    @click.group()
+    def cli():
+        """The main command."""
+
+    @cli.command()
+    @click.option('--count', help='The count.')
+    def sync(count):
+        """Synchronizes things."""
+
+    ctx = click.Context(cli, info_name='cli', terminal_width=80)
+    help = cli.get_help(ctx)
+    assert 'sync  Synchronizes things.' in help
+    assert cli.get_help(ctx) is help
+    assert click.Context(cli, info_name='cli',
+                         terminal_width=60).get_help() is not help
+
+    @cli.command()
+    def push():
+        """Pushes things."""
+    assert 'push  Pushes things.' in cli.get_help(ctx)
+
+    sub_ctx = click.Context(sync, info_name='sync', parent=ctx)
+    assert 'The count.' in sync.get_help(sub_ctx)
+    sync.params[0].help = 'Changed.'
+    assert 'The count.' in sync.get_help(sub_ctx)
+    sync.invalidate_help_cache()
+    assert 'Changed.' in sync.get_help(sub_ctx)
+
+    pages = cli.prerender_help(ctx)
+    assert sorted(pages) == ['cli', 'cli push', 'cli sync']
+    assert pages['cli sync'] == sync.get_help(sub_ctx)
+
+    result = runner.invoke(cli, ['sync', '--help'], terminal_width=80)
+    assert not result.exception
+    assert result.output == pages['cli sync'] + '\n'
+
+
+def test_help_cache_context_params():
+    force = click.Option(['--force'], is_flag=True, help='Force it.')
+
+    class AdminCommand(click.Command):
+        def get_params(self, ctx):
+            rv = click.Command.get_params(self, ctx)
+            if ctx.obj == 'admin':
+                rv = rv + [force]
+            return rv
+
+    class UncachedCommand(click.Command):
+        def format_epilog(self, ctx, formatter):
+            formatter.write_paragraph()
+            formatter.write_text('Logged in as %s.' % ctx.obj)
+
+        def get_help_cache_key(self, ctx, formatter):
+            return None
+
+    cli = AdminCommand('cli')
+    assert '--force' not in click.Context(cli, obj='user').get_help()
+    assert 'Force it.' in click.Context(cli, obj='admin').get_help()
+    cli = UncachedCommand('cli')
+    assert 'Logged in as user.' in click.Context(cli, obj='user').get_help()
+    assert 'Logged in as admin.' in \
+        click.Context(cli, obj='admin').get_help()
+
+
+def test_run_batch(runner, tmpdir):
+    import json
+
+    @click.command()
+    @click.option('--count', type=click.INT, default=1)
+    @click.argument('name')
+    def cli(count, name):
+        click.echo(' '.join([name] * count))
+
+    lines = [
+        '# a comment',
+        'Peter',
+        '',
+        '--count 2 "John Doe"',
+        '--count x Paul',
+    ]
+
+    for workers in None, 2:
+        report = tmpdir.join('report.json')
+        with runner.isolation() as out:
+            with report.open('w') as f:
+                failed = cli.run_batch(lines, prog_name='cli', report=f,
+                                       workers=workers)
+        assert failed == 1
+        output = out.getvalue().decode('utf-8')
+        # With workers the lines run concurrently and their output can
+        # come in any order.
+        assert 'Peter' in output.splitlines()
+        assert 'John Doe John Doe' in output.splitlines()
+        assert 'Invalid value for "--count"' in output
+
+        results = [json.loads(x) for x in report.readlines()]
+        assert [x['line'] for x in results] == [2, 4, 5]
+        assert [x['exit_code'] for x in results] == [0, 0, 2]
+        assert results[1]['args'] == ['--count', '2', 'John Doe']
+        assert all(x['duration'] >= 0 for x in results)
+
+
+def test_dispatch(runner, monkeypatch):
+    import locale
+    import click.core
+
+    calls = []
+    original = locale.getpreferredencoding
+
+    def getpreferredencoding(*args):
+        calls.append(True)
+        return original(*args)
+
+    monkeypatch.setattr(click.core, '_environment_verified', False)
+    monkeypatch.setattr(locale, 'getpreferredencoding', getpreferredencoding)
+
+    @click.command()
+    @click.option('--count', type=click.INT, default=1)
+    def cli(count):
+        click.echo('Count: %d' % count)
+
+    with runner.isolation(env={'_CLI_COMPLETE': 'source'}) as out:
+        assert cli.dispatch(['--count', '2'], prog_name='cli') == 0
+        assert cli.dispatch(['--count', 'x'], prog_name='cli') == 2
+        assert cli.dispatch(['--help'], prog_name='cli') == 0
+
+    output = out.getvalue().decode('utf-8')
+    assert output.startswith('Count: 2\nUsage: cli [OPTIONS]\n')
+    assert 'Invalid value for "--count"' in output
+    assert 'complete' not in output
+    if not click.core.PY2:
+        assert len(calls) == 1
+
+
+def test_suggestions(runner):
+    @click.group()
+    def cli():
+        pass
+
+    for name in 'install', 'uninstall', 'list', 'show', 'search':
+        cli.command(name)(lambda: None)
+
+    @cli.command()
+    @click.option('--verbose', is_flag=True)
+    @click.option('--version-check', is_flag=True)
+    @click.option('--quiet', is_flag=True)
+    def freeze(verbose, version_check, quiet):
+        pass
+
+    result = runner.invoke(cli, ['instal'])
+    assert result.exit_code == 2
+    assert 'Error: No such command "instal".  Did you mean "install"?' \
+        in result.output
+    assert isinstance(result.exception, SystemExit)
+
+    result = runner.invoke(cli, ['shoe'])
+    assert 'No such command "shoe".  Did you mean "show"?' in result.output
+
+    result = runner.invoke(cli, ['xyz'])
+    assert result.output.splitlines()[-1] == 'Error: No such command "xyz".'
+
+    result = runner.invoke(cli, ['freeze', '--ver'])
+    assert 'no such option: --ver  (Possible options: --verbose, ' \
+        '--version-check)' in result.output
+
+    result = runner.invoke(cli, ['freeze', '--quite'])
+    assert 'no such option: --quite  Did you mean --quiet?' in result.output
+
+    with click.Context(cli) as ctx:
+        try:
+            cli.resolve_command(ctx, ['lst'])
+        except click.NoSuchCommand as e:
+            assert e.command_name == 'lst'
+            assert e.possibilities == ['list']
+        else:
+            assert False, 'expected NoSuchCommand'
+
+
+def test_command_collection_help(runner):
+    calls = []
+
+    class Source(click.Group):
+        def list_commands(self, ctx):
+            calls.append(self.name)
+            return click.Group.list_commands(self, ctx)
+
+    first = Source('first')
+    second = Source('second')
+    for idx in range(10):
+        first.add_command(click.Command('a%d' % idx, help='First %d.' % idx))
+        second.add_command(click.Command('b%d' % idx,
+                                         help='Second %d.' % idx))
+
+    cli = click.CommandCollection(sources=[first, second])
+    result = runner.invoke(cli, ['--help'])
+    assert not result.exception
+    assert 'a3  First 3.' in result.output
+    assert 'b7  Second 7.' in result.output
+    # The sources are not listed once per command.
+    assert calls.count('second') <= 2
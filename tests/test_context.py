@@ -110,3 +110,28 @@ def test_multi_enter(runner):
     result = runner.invoke(cli, [])
     assert result.exception is None
     assert called == [True]
+
+
+def test_inherited_settings():
+    cmd = click.Command('cmd')
+    root = click.Context(cmd, info_name='root', terminal_width=60,
+                         help_option_names=['-h'])
+    ctx = root
+    for x in range(20):
+        ctx = click.Context(cmd, info_name='sub%d' % x, parent=ctx)
+
+    assert ctx.terminal_width == 60
+    assert ctx.help_option_names == ['-h']
+    assert ctx.token_normalize_func is None
+    assert ctx.color is None
+
+    ctx.color = True
+    assert ctx.color is True
+    assert ctx.parent.color is None
+
+    other = click.Context(cmd, parent=root, help_option_names=['--info'])
+    assert other.help_option_names == ['--info']
+    assert click.Context(cmd).help_option_names == ['--help']
+
+    ctx.custom_attribute = 42
+    assert ctx.custom_attribute == 42
@@ -47,3 +47,38 @@ def test_light_imports():
         if module == 'click' or module.startswith('click.'):
             continue
         assert module in ALLOWED_IMPORTS
+
+
+LAZY_TEST = b'''\
+import sys
+import json
+import click
+
+@click.command()
+@click.option('--name', default='World')
+def cli(name):
+    click.echo('Hello %s!' % name)
+
+try:
+    cli.main(['--name', 'Peter'])
+except SystemExit:
+    pass
+rv = sorted(x for x in sys.modules if x.startswith('click'))
+click.echo(json.dumps(rv))
+'''
+
+
+def test_lazy_imports():
+    c = subprocess.Popen([sys.executable, '-'], stdin=subprocess.PIPE,
+                         stdout=subprocess.PIPE)
+    rv = c.communicate(LAZY_TEST)[0]
+
+    if sys.version_info[0] != 2:
+        rv = rv.decode('utf-8')
+    output, imported = rv.splitlines()
+    assert output == 'Hello Peter!'
+    imported = json.loads(imported)
+    print(imported)
+
+    for module in 'termui', '_termui_impl', 'formatting', '_textwrap':
+        assert 'click.' + module not in imported
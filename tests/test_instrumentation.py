@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+import click
+from click import instrumentation
+
+
+def test_events(runner):
+    @click.group()
+    def cli():
+        pass
+
+    @cli.command()
+    @click.option('--count', type=click.INT, default=1)
+    def sync(count):
+        pass
+
+    events = []
+    instrumentation.add_sink(events.append)
+    try:
+        result = runner.invoke(cli, ['sync', '--count', '2'])
+    finally:
+        instrumentation.remove_sink(events.append)
+    assert not result.exception
+
+    phases = set((x.phase, x.command_path, x.name) for x in events)
+    assert ('make_context', 'cli', None) in phases
+    assert ('make_context', 'cli sync', None) in phases
+    assert ('parse_args', 'cli sync', None) in phases
+    assert ('parameter', 'cli sync', 'count') in phases
+    assert ('callback', 'cli sync', 'sync') in phases
+    assert ('invoke', 'cli', None) in phases
+    assert ('completion', 'cli', None) in phases
+    assert all(x.duration >= 0 for x in events)
+
+    del events[:]
+    runner.invoke(cli, ['sync'])
+    assert events == []
+
+
+def test_profile_env(runner):
+    @click.command()
+    @click.option('--name')
+    def cli(name):
+        click.echo('Hello')
+
+    result = runner.invoke(cli, ['--name', 'x'], env={'CLICK_PROFILE': '1'})
+    assert not result.exception
+    lines = result.output.splitlines()
+    assert lines[0] == 'Hello'
+    assert lines[1].split() == ['phase', 'command', 'name', 'calls',
+                                'total', 'ms']
+    assert any(x.split()[:3] == ['parameter', 'cli', 'name']
+               for x in lines[2:])
+    assert instrumentation._sinks == []
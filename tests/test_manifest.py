@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+import os
+import click
+from click.manifest import CommandManifest, load_or_build
+
+
+def make_cli():
+    @click.group()
+    @click.option('--debug/--no-debug')
+    def cli(debug):
+        pass
+
+    @cli.command()
+    @click.option('--mode', type=click.Choice(['fast', 'slow']))
+    def sync(mode):
+        """Synchronizes things."""
+
+    @cli.command()
+    def push():
+        """Pushes things."""
+
+    return cli
+
+
+def test_manifest_roundtrip(tmpdir):
+    cli = make_cli()
+    filename = str(tmpdir.join('manifest.json'))
+    manifest = load_or_build(filename, cli, key='1')
+    assert os.path.isfile(filename)
+
+    node = manifest.find_node(['sync'])
+    assert node['short_help'] == 'Synchronizes things.'
+    assert [x['name'] for x in manifest.tree['commands']] == ['push', 'sync']
+    mode = [x for x in node['params'] if x['name'] == 'mode'][0]
+    assert mode['choices'] == ['fast', 'slow']
+    assert manifest.find_node(['missing']) is None
+
+    loaded = CommandManifest.load(filename, key='1')
+    assert loaded is not None
+    assert loaded.tree == manifest.tree
+    assert CommandManifest.load(filename, key='2') is None
+
+
+def test_manifest_stale(tmpdir):
+    source = tmpdir.join('plugin.py')
+    source.write('x = 1\n')
+    filename = str(tmpdir.join('manifest.json'))
+    manifest = CommandManifest.build(make_cli(), sources=[str(source)])
+    manifest.save(filename)
+    assert CommandManifest.load(filename) is not None
+
+    mtime = os.stat(str(source)).st_mtime
+    os.utime(str(source), (mtime + 10, mtime + 10))
+    assert manifest.is_stale()
+    assert CommandManifest.load(filename) is None
+
+
+def test_manifest_help(runner):
+    cli = make_cli()
+    manifest = CommandManifest.build(cli)
+    manifest.find_node(['push'])['short_help'] = 'From the manifest.'
+
+    def fail(ctx, name):
+        raise AssertionError('commands must not be loaded')
+    cli.get_command = fail
+
+    result = runner.invoke(cli, ['--help'], manifest=manifest)
+    assert not result.exception
+    assert 'push  From the manifest.' in result.output
+
+
+def test_manifest_completion(runner):
+    cli = make_cli()
+    manifest = CommandManifest.build(cli)
+    assert manifest.complete([], '') == ['push', 'sync']
+    assert manifest.complete([], '--d') == ['--debug']
+    assert manifest.complete(['--debug'], 's') == ['sync']
+    assert manifest.complete(['sync'], '--') == ['--mode', '--help']
+    assert manifest.complete(['sync', '--mode', 'fast'], '-') == \
+        ['--mode', '--help']
+    assert manifest.complete(['missing'], '') is None
+
+    result = runner.invoke(cli, [], manifest=manifest, env={
+        'COMP_WORDS': 'cli s',
+        'COMP_CWORD': '1',
+        '_CLI_COMPLETE': 'complete',
+    })
+    assert result.output == 'sync\n'
+
+    # Commands that were registered after the manifest was built are
+    # completed by loading them.
+    @cli.command()
+    @click.option('--force', is_flag=True)
+    def late():
+        pass
+
+    result = runner.invoke(cli, [], manifest=manifest, env={
+        'COMP_WORDS': 'cli late --f',
+        'COMP_CWORD': '2',
+        '_CLI_COMPLETE': 'complete',
+    })
+    assert result.output == '--force\n'
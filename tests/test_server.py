@@ -0,0 +1,101 @@
+import os
+import stat
+import threading
+
+import pytest
+
+import click
+from click import server
+
+
+pytestmark = pytest.mark.skipif(not server.is_supported(),
+                                reason='server mode not supported')
+
+
+def _invoke(cli, tmpdir, argv, input=b'', env=None, cwd=None, **extra):
+    path = str(tmpdir.join('cli.sock'))
+    srv = server.CommandServer(cli, path, **extra)
+    srv.bind()
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+    in_r, in_w = os.pipe()
+    out_r, out_w = os.pipe()
+    os.write(in_w, input)
+    os.close(in_w)
+
+    rv = {}
+
+    def client():
+        rv['code'] = server.run_client(path, argv, env=env,
+                                       cwd=cwd or str(tmpdir),
+                                       stdin=in_r, stdout=out_w,
+                                       stderr=out_w)
+
+    t = threading.Thread(target=client)
+    t.start()
+    try:
+        pid = srv.handle_request()
+    finally:
+        t.join()
+        srv.close()
+    os.waitpid(pid, 0)
+    os.close(in_r)
+    os.close(out_w)
+
+    chunks = []
+    while 1:
+        chunk = os.read(out_r, 4096)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    os.close(out_r)
+    return rv['code'], b''.join(chunks).decode('utf-8')
+
+
+def test_basic_server(tmpdir):
+    @click.command()
+    @click.option('--name', envvar='SERVER_NAME')
+    @click.argument('data', type=click.File('r'))
+    def cli(name, data):
+        click.echo('Hello %s!' % name)
+        click.echo(data.read().upper(), nl=False)
+        click.echo(os.getcwd())
+
+    code, output = _invoke(cli, tmpdir, ['cli', '-'], input=b'foo\n',
+                           env={'SERVER_NAME': 'World'})
+    assert code == 0
+    assert output.splitlines() == [
+        'Hello World!',
+        'FOO',
+        os.path.realpath(str(tmpdir)),
+    ]
+
+
+def test_server_exit_codes(tmpdir):
+    @click.command()
+    @click.option('--code', type=int)
+    def cli(code):
+        raise SystemExit(code)
+
+    code, output = _invoke(cli, tmpdir, ['cli', '--code', '42'])
+    assert code == 42
+
+    code, output = _invoke(cli, tmpdir, ['cli', '--nope'])
+    assert code == 2
+    assert 'no such option: --nope' in output
+
+    code, output = _invoke(cli, tmpdir, ['cli', '--code', '1'],
+                           prog_name='other')
+    assert code == 1
+
+
+def test_server_setup_errors(tmpdir):
+    @click.command()
+    def cli():
+        click.echo('Hello World!')
+
+    code, output = _invoke(cli, tmpdir, ['cli'],
+                           cwd=str(tmpdir.join('missing')))
+    assert code == 1
+    assert 'Traceback' in output
+    assert 'Hello World!' not in output
@@ -1,4 +1,10 @@
+import multiprocessing
+import threading
+
 import click
+import pytest
+
+import click._termui_impl
 
 
 def test_progressbar_strip_regression(runner, monkeypatch):
@@ -12,3 +18,63 @@ def test_progressbar_strip_regression(runner, monkeypatch):
 
     monkeypatch.setattr(click._termui_impl, 'isatty', lambda _: True)
     assert label in runner.invoke(cli, []).output
+
+
+def test_progressbar_throttling(runner, monkeypatch):
+    monkeypatch.setattr(click._termui_impl, 'isatty', lambda _: True)
+
+    def render_count(**extra):
+        @click.command()
+        def cli():
+            with click.progressbar(range(1000), **extra) as progress:
+                for thing in progress:
+                    pass
+        return runner.invoke(cli, []).output.count('\r')
+
+    assert render_count(refresh_interval=0) > 1000
+    assert render_count(refresh_interval=60) < 5
+
+    @click.command()
+    def cli():
+        with click.progressbar(length=100, refresh_interval=60) as progress:
+            for x in range(10):
+                progress.update(10)
+            assert progress.pos == 100
+
+    output = runner.invoke(cli, []).output
+    assert output.count('\r') < 4
+    assert '100%' in output
+
+
+def _advance(counter, n):
+    for x in range(n):
+        counter.update(1)
+
+
+def test_progressbar_threaded(runner, monkeypatch):
+    monkeypatch.setattr(click._termui_impl, 'isatty', lambda _: True)
+
+    @click.command()
+    def cli():
+        with click.progressbar(length=1000, threaded=True,
+                               refresh_interval=0.01) as bar:
+            threads = [threading.Thread(target=_advance, args=(bar, 100))
+                       for x in range(5)]
+            counter = bar.shared_counter()
+            processes = [multiprocessing.Process(target=_advance,
+                                                 args=(counter, 100))
+                         for x in range(5)]
+            for worker in threads + processes:
+                worker.start()
+            for worker in threads + processes:
+                worker.join()
+        assert bar.pos == 1000
+        assert bar.finished
+
+    result = runner.invoke(cli, [])
+    assert result.exception is None
+    assert result.output.rsplit('\r', 1)[1].startswith(
+        '\x1b[?25l  [####################################]  100%')
+
+    bar = click.progressbar(length=10)
+    pytest.raises(RuntimeError, bar.shared_counter)
@@ -1,6 +1,8 @@
+import io
 import os
 import sys
 import click
+import pytest
 
 import click._termui_impl
 
@@ -66,6 +68,13 @@ def test_styling():
         assert click.style(text, **styles) == ref
         assert click.unstyle(ref) == text
 
+    # Styles are cached by their arguments.
+    for x in range(2):
+        assert click.style('x', fg='red', bold=True, reset=False) == \
+            '\x1b[31m\x1b[1mx'
+    assert click.unstyle('no styles') == 'no styles'
+    pytest.raises(TypeError, click.style, 'x', fg='mauve')
+
 
 def test_filename_formatting():
     assert click.format_filename(b'foo.txt') == 'foo.txt'
@@ -227,3 +236,214 @@ def test_open_file(runner):
         result = runner.invoke(cli, ['-'], input='foobar')
         assert result.exception is None
         assert result.output == 'foobar\nmeep\n'
+
+
+@pytest.mark.parametrize('ext', ['.gz', '.bz2', '.xz'])
+def test_open_file_compression(runner, ext):
+    if ext == '.bz2' and sys.version_info[0] == 2:
+        with pytest.raises(IOError):
+            click.open_file('hello.bz2', 'w', compression='auto')
+        return
+    pytest.importorskip({'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'lzma'}[ext])
+
+    @click.command()
+    @click.argument('src', type=click.File('r', compression='auto'))
+    @click.argument('dst', type=click.File('w', compression='auto',
+                                           atomic=True))
+    def cli(src, dst):
+        for line in src:
+            dst.write(line.upper())
+
+    with runner.isolated_filesystem():
+        with click.open_file('hello' + ext, 'w', compression='auto') as f:
+            f.write('hello\nworld\n')
+        with open('hello' + ext, 'rb') as f:
+            assert f.read(2) != b'he'
+
+        # Reading detects the compression from the data, not the name.
+        os.rename('hello' + ext, 'hello.dat')
+        result = runner.invoke(cli, ['hello.dat', 'out' + ext])
+        assert result.exception is None
+        assert sorted(os.listdir('.')) == sorted(['hello.dat', 'out' + ext])
+        with click.open_file('out' + ext, compression='auto') as f:
+            assert f.read() == 'HELLO\nWORLD\n'
+
+        with open('out' + ext, 'rb') as f:
+            data = f.read()
+        result = runner.invoke(cli, ['-', '-'], input=data)
+        assert result.exception is None
+        assert result.output == 'HELLO\nWORLD\n'
+
+
+def test_open_file_compression_stdout(runner):
+    gzip = pytest.importorskip('gzip')
+
+    @click.command()
+    def cli():
+        with click.open_file('-', 'wb', compression='gzip') as f:
+            f.write(b'Hello World!')
+
+    result = runner.invoke(cli)
+    assert result.exception is None
+    assert gzip.GzipFile(fileobj=io.BytesIO(result.output_bytes)).read() == \
+        b'Hello World!'
+
+
+@pytest.mark.skipif(not os.path.isdir('/dev/fd'), reason='requires /dev/fd')
+@pytest.mark.parametrize('compressed', [True, False])
+def test_open_file_compression_pipe(compressed):
+    gzip = pytest.importorskip('gzip')
+    import threading
+    data = b'hello\nworld\n' * 1000
+    if compressed:
+        buf = io.BytesIO()
+        with gzip.GzipFile(fileobj=buf, mode='wb') as f:
+            f.write(data)
+        payload = buf.getvalue()
+    else:
+        payload = data
+
+    # A pipe can only be read once, so sniffing the compression must not
+    # consume what is read afterwards.
+    r, w = os.pipe()
+
+    def writer():
+        with os.fdopen(w, 'wb') as f:
+            f.write(payload)
+    thread = threading.Thread(target=writer)
+    thread.daemon = True
+    thread.start()
+    try:
+        with click.open_file('/dev/fd/%d' % r, 'rb',
+                             compression='auto') as f:
+            assert f.read() == data
+    finally:
+        thread.join()
+        os.close(r)
+
+
+def test_bulk_io(runner, capfd):
+    assert list(click.iter_chunks(io.BytesIO(b'abcdefg'), 3)) == \
+        [b'abc', b'def', b'g']
+
+    @click.command()
+    @click.argument('src', type=click.File('rb', bulk=True))
+    @click.argument('dst', type=click.File('wb', bulk=True))
+    def cat(src, dst):
+        for chunk in click.iter_chunks(src):
+            dst.write(chunk)
+
+    with runner.isolated_filesystem():
+        result = runner.invoke(cat, ['-', 'out.bin'], input=b'x' * 100000)
+        assert result.exception is None
+        with open('out.bin', 'rb') as f:
+            assert f.read() == b'x' * 100000
+
+    # Rebuffered standard streams write to the same file descriptor.
+    f = click.get_text_stream('stdout', buffering=65536)
+    f.write(u'Hello\n')
+    assert capfd.readouterr()[0] == ''
+    f.flush()
+    assert capfd.readouterr()[0] == 'Hello\n'
+
+
+def test_bulk_stdin_keeps_buffered_data(monkeypatch):
+    import threading
+    data = b'x' * 20000
+    r, w = os.pipe()
+
+    def writer():
+        with os.fdopen(w, 'wb') as f:
+            f.write(data)
+    thread = threading.Thread(target=writer)
+    thread.daemon = True
+    thread.start()
+    stdin = io.open(r, 'rb')
+    monkeypatch.setattr('sys.stdin', io.TextIOWrapper(stdin))
+    try:
+        # Detecting the compression fills the buffer of stdin which must
+        # not be skipped by the bigger buffer.
+        with click.open_file('-', 'rb', compression='auto',
+                             buffering=1024 * 1024) as f:
+            assert f.read() == data
+    finally:
+        thread.join()
+        stdin.close()
+
+
+def test_copy_stream(tmpdir):
+    class Progress(object):
+        pos = 0
+
+        def update(self, n):
+            self.pos += n
+
+    data = ''.join('%06d\n' % x for x in range(50000)).encode('ascii')
+    src_path = str(tmpdir.join('src'))
+    dst_path = str(tmpdir.join('dst'))
+    with open(src_path, 'wb') as f:
+        f.write(data)
+
+    # Between files, after part of the source was read.
+    progress = Progress()
+    with open(src_path, 'rb') as src:
+        assert src.read(7) == data[:7]
+        with open(dst_path, 'wb') as dst:
+            dst.write(b'header\n')
+            assert click.copy_stream(src, dst, progress=progress,
+                                     chunk_size=4096) == len(data) - 7
+            dst.write(b'footer\n')
+        assert src.read() == b''
+    with open(dst_path, 'rb') as f:
+        assert f.read() == b'header\n' + data[7:] + b'footer\n'
+    assert progress.pos == len(data) - 7
+
+    # From a pipe with data already in the buffer.
+    r, w = os.pipe()
+    os.write(w, data[:65536])
+    os.close(w)
+    with io.open(r, 'rb') as src:
+        assert src.read(1) == data[:1]
+        with open(dst_path, 'wb') as dst:
+            assert click.copy_stream(src, dst, length=1000) == 1000
+            assert click.copy_stream(src, dst) == 65536 - 1001
+    with open(dst_path, 'rb') as f:
+        assert f.read() == data[1:65536]
+
+    # Streams without a file descriptor.
+    dst = io.BytesIO()
+    assert click.copy_stream(io.BytesIO(data), dst, chunk_size=1000) == \
+        len(data)
+    assert dst.getvalue() == data
+
+
+def test_buffered_echo(monkeypatch, tmpdir):
+    class Stream(io.BytesIO):
+        flushes = 0
+
+        def flush(self):
+            self.flushes += 1
+
+    out = Stream()
+    monkeypatch.setattr('sys.stdout', io.TextIOWrapper(out, encoding='utf-8'))
+    with click.buffered_echo(threshold=100) as buf:
+        for x in range(40):
+            click.echo(u'line %d' % x)
+        click.secho(u'red', fg='red')
+        click.echo(b'bytes')
+        assert out.flushes == 4
+        buf.flush()
+        assert out.getvalue().endswith(b'red\nbytes\n')
+        click.echo(u'end', nl=False)
+    assert out.getvalue() == u''.join(
+        [u'line %d\n' % x for x in range(40)]).encode('utf-8') + \
+        b'red\nbytes\nend'
+
+    # Files that are passed explicitly can be closed within the block and
+    # are written right away.
+    path = str(tmpdir.join('out.txt'))
+    with click.buffered_echo():
+        with open(path, 'w') as f:
+            click.echo('hello', file=f)
+    with open(path) as f:
+        assert f.read() == 'hello\n'